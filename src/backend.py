@@ -1,17 +1,55 @@
 import os
+import sys
+import gzip
 import json
+import math
+import time
+import base64
+import pickle
+import hashlib
+import hmac
+import asyncio
+import threading
+import warnings
+from array import array
+from bisect import bisect_left
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
 import collections
+import numpy as np
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from typing import Optional, List
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 load_dotenv()
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pool()
+    try:
+        await zone_shape_cache.get("full")
+    except Exception as e:
+        print(f"Zone shape pre-build failed (will retry on first request): {e}")
+    yield
+    await engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -34,17 +72,99 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT", "3306")
 DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Pool sizing comes from the environment; pre-ping and recycle keep RDS from
+# handing us connections it has already closed for idleness.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", DB_POOL_SIZE))
+
+engine = create_async_engine(
+    DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+class PoolWaitStats:
+    """Rolling record of how long requests waited to check a connection out of the pool."""
+    def __init__(self, window=1000):
+        self.samples = collections.deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record(self, wait_seconds):
+        wait_ms = wait_seconds * 1000
+        self.samples.append(wait_ms)
+        self.checkouts += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        pick = lambda pct: round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 3) if ordered else None
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "mean_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else None,
+            "p50_wait_ms": pick(50),
+            "p95_wait_ms": pick(95),
+            "p99_wait_ms": pick(99),
+            "max_wait_ms": round(self.max_wait_ms, 3),
+        }
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+pool_wait_stats = PoolWaitStats()
 
-def get_db():
-    db = SessionLocal()
+@asynccontextmanager
+async def checkout():
+    """Checks a connection out of the pool, recording how long the checkout took."""
+    start = time.perf_counter()
+    try:
+        conn = await engine.connect().start()
+    except PoolTimeoutError:
+        pool_wait_stats.timeouts += 1
+        raise
+    pool_wait_stats.record(time.perf_counter() - start)
     try:
-        yield db
+        yield conn
     finally:
-        db.close()
+        await conn.close()
+
+async def warm_up_pool():
+    """Opens DB_POOL_WARMUP connections at startup so the first requests skip the TLS handshake."""
+    async def ping():
+        async with checkout() as conn:
+            await conn.execute(text("SELECT 1"))
+    try:
+        await asyncio.gather(*(ping() for _ in range(min(DB_POOL_WARMUP, DB_POOL_SIZE))))
+        print(f"Database pool warmed with {min(DB_POOL_WARMUP, DB_POOL_SIZE)} connections.")
+    except Exception as e:
+        print(f"Database pool warm-up failed (continuing): {e}")
+
+async def fetch_rows(sql, params):
+    """Runs one query on its own pooled connection so independent queries can be gathered."""
+    async with checkout() as conn:
+        result = await conn.execute(text(sql), params)
+        return [tuple(row) for row in result.fetchall()]
+
+async def fetch_rows_batch(queries):
+    """Runs [(sql, params)] back to back on one pooled connection; for small queries not worth a connection each."""
+    async with checkout() as conn:
+        results = []
+        for sql, params in queries:
+            result = await conn.execute(text(sql), params)
+            results.append([tuple(row) for row in result.fetchall()])
+        return results
+
+ALL_DAYS_OF_WEEK = (1, 2, 3, 4, 5, 6, 7)
 
 class LmpRangeQuery(BaseModel):
     start_day: str
@@ -53,169 +173,1294 @@ class LmpRangeQuery(BaseModel):
     start_hour: Optional[int] = None
     end_hour: Optional[int] = None
     monitored_facility: Optional[str] = None
+    format: str = "json"
+    resolution: str = "hour"
+    max_points: Optional[int] = None
+    downsample: str = "lttb"
+
+class LmpSummaryQuery(LmpRangeQuery):
+    top_n: int = 10
+    percentiles: List[float] = [5, 25, 50, 75, 95]
+
+class LmpCongestionQuery(LmpRangeQuery):
+    aggregate: str = "mean"
+    load_zone: Optional[str] = None
+
+class LmpSimilarQuery(BaseModel):
+    target_day: str
+    metric: str = "rt"
+    k: int = 10
+    zones: Optional[List[str]] = None
+    days_of_week: List[int] = list(ALL_DAYS_OF_WEEK)
+    exclude_days: int = 0
+
+# --- Query Result Cache ---
+
+class QueryResultCache:
+    """
+    In-process LRU of query results keyed by the normalized query, with an optional
+    on-disk tier. Stable entries (fully verified history) never expire and are the
+    only ones written to disk; volatile entries expire after volatile_ttl seconds or
+    when the watchdog calls /api/cache/invalidate.
+    """
+    def __init__(self, max_entries, disk_dir=None, volatile_ttl=300):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.volatile_ttl = volatile_ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        # The key's range leads the file name so invalidate_range can match files without unpickling them
+        key_range = cache_key_range(key)
+        prefix = f"{key_range[0]:%Y%m%d%H}-{key_range[1]:%Y%m%d%H}-" if key_range else "all-"
+        return os.path.join(self.disk_dir, prefix + hashlib.sha256(key.encode()).hexdigest() + ".pkl")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stable, stored_at = entry
+                if stable or time.monotonic() - stored_at < self.volatile_ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    value = pickle.load(f)
+                self._store(key, value, stable=True)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+            except Exception as e:
+                print(f"Ignoring unreadable cache file for key {key}: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value, stable):
+        self._store(key, value, stable)
+        if stable and self.disk_dir:
+            tmp_path = self._disk_path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+
+    def _store(self, key, value, stable):
+        with self._lock:
+            self._entries[key] = (value, stable, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_volatile(self):
+        with self._lock:
+            stale = [key for key, (_, stable, _) in self._entries.items() if not stable]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+            return len(stale)
+
+    def invalidate_range(self, start_dt=None, end_dt=None):
+        """
+        Drops volatile entries plus every entry, stable ones and their disk files
+        included, whose range overlaps [start_dt, end_dt); no bounds drops everything.
+        Called when history is rewritten (backfills, gap repairs, late re-fetches).
+        """
+        def overlaps(key_range):
+            if start_dt is None or key_range is None:
+                return True
+            return key_range[0] < end_dt and start_dt < key_range[1]
+
+        with self._lock:
+            stale = [key for key, (_, stable, _) in self._entries.items() if not stable or overlaps(cache_key_range(key))]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                try:
+                    first, last, _ = name.split("-", 2)
+                    file_range = (datetime.strptime(first, "%Y%m%d%H"), datetime.strptime(last, "%Y%m%d%H"))
+                except ValueError:
+                    file_range = None  # unrecognized (or pre-range) file names are always dropped
+                if overlaps(file_range):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, name))
+                        stale.append(name)
+                    except FileNotFoundError:
+                        pass
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "stable_entries": sum(1 for _, stable, _ in self._entries.values() if stable),
+                "invalidations": self.invalidations,
+            }
+
+result_cache = QueryResultCache(
+    max_entries=int(os.getenv("LMP_CACHE_MAX_ENTRIES", 64)),
+    disk_dir=os.getenv("LMP_CACHE_DIR") or None,
+    volatile_ttl=int(os.getenv("LMP_CACHE_VOLATILE_TTL", 300)),
+)
+
+def range_cache_key(kind, params):
+    """Normalizes built query params (sorted weekdays, expanded hours) into a stable cache key."""
+    normalized = {
+        "kind": kind,
+        "start_dt": params["start_dt"].isoformat(),
+        "end_dt": params["end_dt"].isoformat(),
+        "hours": sorted(set(params["hours"])),
+        "days_of_week": sorted(set(params["days_of_week"])),
+        "monitored_facility": params.get("monitored_facility"),
+    }
+    return json.dumps(normalized, sort_keys=True)
+
+def cache_key_range(key):
+    """(start_dt, end_dt) of a range_cache_key, or None for keys without a range."""
+    try:
+        normalized = json.loads(key)
+        return datetime.fromisoformat(normalized["start_dt"]), datetime.fromisoformat(normalized["end_dt"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+async def query_range_verified(start_dt, end_dt):
+    """True when the whole range is in the past and every hour in it has verified ('v') status."""
+    if end_dt > datetime.now():
+        return False
+    status_rows = await fetch_rows("""
+        SELECT COUNT(*) AS n_hours, COALESCE(SUM(status = 'v'), 0) AS n_verified
+        FROM pjm_hourly_status
+        WHERE datetime_beginning_ept >= :start_dt AND datetime_beginning_ept < :end_dt
+    """, {"start_dt": start_dt, "end_dt": end_dt})
+    n_hours, n_verified = status_rows[0]
+    expected_hours = int((end_dt - start_dt).total_seconds() // 3600)
+    # Allow for the spring-forward hour missing from each year of EPT history
+    dst_slack = 1 + (end_dt - start_dt).days // 365
+    return n_hours == n_verified and n_verified >= expected_hours - dst_slack
+
+class RangeVerificationCache:
+    """
+    Shares one verification query per range across the range, summary and congestion
+    requests a dashboard fires together: concurrent callers await the same in-flight
+    task and later ones reuse its answer for `ttl` seconds.
+    """
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}  # (start_dt, end_dt) -> (task, started_at)
+
+    async def get(self, start_dt, end_dt):
+        now = time.monotonic()
+        key = (start_dt, end_dt)
+        entry = self._entries.get(key)
+        if entry is None or now - entry[1] > self.ttl or self._failed(entry[0]):
+            self._entries = {k: e for k, e in self._entries.items() if now - e[1] <= self.ttl}
+            entry = (asyncio.ensure_future(query_range_verified(start_dt, end_dt)), now)
+            self._entries[key] = entry
+        # Shielded so one cancelled request does not cancel the query for the others
+        return await asyncio.shield(entry[0])
+
+    @staticmethod
+    def _failed(task):
+        return task.done() and (task.cancelled() or task.exception() is not None)
+
+    def invalidate(self):
+        self._entries.clear()
+
+range_verification = RangeVerificationCache(ttl=float(os.getenv("LMP_VERIFY_CACHE_TTL", 60)))
+
+async def is_range_verified(start_dt, end_dt):
+    return await range_verification.get(start_dt, end_dt)
+
+# --- Range Response Formats ---
+
+RANGE_RESPONSE_FORMATS = ("json", "columnar", "arrow", "ndjson")
+PRICE_METRICS = ("da", "rt", "net")
+STREAM_BATCH_ROWS = int(os.getenv("LMP_STREAM_BATCH_ROWS", 5000))
+
+def encode_typed_array(typecode, values):
+    """Packs values into a little-endian typed array and base64-encodes it for JSON transport."""
+    arr = array(typecode, values)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return base64.b64encode(arr.tobytes()).decode("ascii")
+
+def build_json_response(lmp_rows, constraint_rows, band_rows=None):
+    # LMP Data Processing (rollups add each period's min/max/std as "bands")
+    lmp_data_by_zone = collections.defaultdict(list)
+    for i, (zone, ts, lmp_da, lmp_rt, lmp_net) in enumerate(lmp_rows):
+        entry = {
+            "datetime_beginning_ept": ts.isoformat(),
+            "lmp_values": {
+                "da": lmp_da,
+                "rt": lmp_rt,
+                "net": lmp_net
+            }
+        }
+        if band_rows:
+            entry["bands"] = dict(zip(ROLLUP_BAND_COLUMNS, band_rows[i][2:]))
+        lmp_data_by_zone[zone].append(entry)
+
+    # Constraints Data Processing
+    constraints_data = []
+    for hour_beginning, monitored_facility, shadow_price in constraint_rows:
+        constraints_data.append({
+            "name": monitored_facility,
+            "timestamp": str(hour_beginning), 
+            "shadow_price": shadow_price 
+        })
+
+    return {
+        "zones": lmp_data_by_zone,
+        "constraints": constraints_data
+    }
+
+def build_columnar_response(lmp_rows, constraint_rows, band_rows=None):
+    """
+    Dense zone x hour grid: da/rt/net are float32 arrays laid out zone-major
+    (index = zone_i * len(timestamps) + time_j), NaN where a zone has no reading.
+    Rollup resolutions also pass band_rows, (zone, ts, *ROLLUP_BAND_COLUMNS), which
+    are shipped as "bands" grids with the same layout.
+    """
+    zones = sorted({row[0] for row in lmp_rows})
+    timestamps = sorted({row[1] for row in lmp_rows})
+    zone_index = {zone: i for i, zone in enumerate(zones)}
+    time_index = {ts: i for i, ts in enumerate(timestamps)}
+    n_times = len(timestamps)
+
+    nan = float("nan")
+    da = array('f', [nan]) * (len(zones) * n_times)
+    rt = array('f', [nan]) * (len(zones) * n_times)
+    net = array('f', [nan]) * (len(zones) * n_times)
+    for zone, ts, lmp_da, lmp_rt, lmp_net in lmp_rows:
+        offset = zone_index[zone] * n_times + time_index[ts]
+        da[offset] = nan if lmp_da is None else float(lmp_da)
+        rt[offset] = nan if lmp_rt is None else float(lmp_rt)
+        net[offset] = nan if lmp_net is None else float(lmp_net)
+
+    bands = {}
+    if band_rows:
+        grids = [array('f', [nan]) * (len(zones) * n_times) for _ in ROLLUP_BAND_COLUMNS]
+        for row in band_rows:
+            offset = zone_index[row[0]] * n_times + time_index[row[1]]
+            for grid, value in zip(grids, row[2:]):
+                grid[offset] = nan if value is None else float(value)
+        bands = {column: encode_typed_array('f', grid) for column, grid in zip(ROLLUP_BAND_COLUMNS, grids)}
+
+    names = sorted({row[1] for row in constraint_rows})
+    constraint_times = sorted({row[0] for row in constraint_rows})
+    name_index = {name: i for i, name in enumerate(names)}
+    constraint_time_index = {ts: i for i, ts in enumerate(constraint_times)}
+
+    response = {
+        "format": "columnar",
+        "zones": zones,
+        "timestamps": [ts.isoformat() for ts in timestamps],
+        "da": encode_typed_array('f', da),
+        "rt": encode_typed_array('f', rt),
+        "net": encode_typed_array('f', net),
+        "constraints": {
+            "names": names,
+            "timestamps": [str(ts) for ts in constraint_times],
+            "name_idx": encode_typed_array('H', (name_index[row[1]] for row in constraint_rows)),
+            "time_idx": encode_typed_array('I', (constraint_time_index[row[0]] for row in constraint_rows)),
+            "shadow_price": encode_typed_array('f', (nan if row[2] is None else float(row[2]) for row in constraint_rows))
+        }
+    }
+    if bands:
+        response["bands"] = bands
+    return response
+
+def build_arrow_response(lmp_rows, constraint_rows, resolution="hour", band_rows=None):
+    """
+    Long-format Arrow IPC stream; rollups add one float32 column per ROLLUP_BAND_COLUMNS.
+    The resolution and the constraints ride along as schema metadata.
+    """
+    columns = {
+        "datetime_beginning_ept": pa.array([row[1] for row in lmp_rows], type=pa.timestamp("s")),
+        "zone": pa.array([row[0] for row in lmp_rows], type=pa.string()).dictionary_encode(),
+        "da": pa.array([None if row[2] is None else float(row[2]) for row in lmp_rows], type=pa.float32()),
+        "rt": pa.array([None if row[3] is None else float(row[3]) for row in lmp_rows], type=pa.float32()),
+        "net": pa.array([None if row[4] is None else float(row[4]) for row in lmp_rows], type=pa.float32()),
+    }
+    if band_rows:
+        for i, column in enumerate(ROLLUP_BAND_COLUMNS, start=2):
+            columns[column] = pa.array([None if row[i] is None else float(row[i]) for row in band_rows], type=pa.float32())
+    table = pa.table(columns)
+    constraints = build_json_response([], constraint_rows)["constraints"]
+    table = table.replace_schema_metadata({"resolution": resolution, "constraints": json.dumps(constraints, default=float)})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type="application/vnd.apache.arrow.stream")
+
+def meta_ndjson_line(resolution):
+    return json.dumps({"type": "meta", "resolution": resolution}) + "\n"
+
+def lmp_ndjson_line(row):
+    """Rollup rows carry ROLLUP_BAND_COLUMNS after the three means; they go out as "bands"."""
+    line = {
+        "type": "lmp",
+        "zone": row[0],
+        "datetime_beginning_ept": row[1].isoformat(),
+        "lmp_values": {"da": row[2], "rt": row[3], "net": row[4]}
+    }
+    if len(row) > 5:
+        line["bands"] = dict(zip(ROLLUP_BAND_COLUMNS, row[5:]))
+    return json.dumps(line, default=float) + "\n"
+
+def constraint_ndjson_line(row):
+    return json.dumps({
+        "type": "constraint",
+        "name": row[1],
+        "timestamp": str(row[0]),
+        "shadow_price": row[2]
+    }, default=float) + "\n"
+
+async def stream_range_ndjson(lmp_query_str, constraints_query_str, params, resolution="hour"):
+    """
+    Yields NDJSON in batches straight off a server-side (unbuffered) cursor: a
+    {"type": "meta"} line with the resolution, LMP rows (ordered by zone/timestamp),
+    then constraint rows, so memory stays bounded by
+    STREAM_BATCH_ROWS however long the range is. Opens its own connection because the
+    request's session is closed before the response body is sent. The status line has
+    already gone out by the time a query can fail, so a failure ends the stream with a
+    {"type": "error"} line; a complete stream ends with {"type": "end"}.
+    """
+    yield meta_ndjson_line(resolution)
+    try:
+        async with checkout() as conn:
+            for sql, to_line in ((lmp_query_str, lmp_ndjson_line), (constraints_query_str, constraint_ndjson_line)):
+                result = await conn.stream(text(sql), params)
+                async for batch in result.partitions(STREAM_BATCH_ROWS):
+                    yield "".join(to_line(row) for row in batch)
+                await result.close()
+    except Exception as e:
+        print(f"An unexpected server error occurred while streaming LMP data: {e}")
+        yield json.dumps({"type": "error", "detail": "An internal server error occurred; the stream is incomplete."}) + "\n"
+        return
+    yield json.dumps({"type": "end"}) + "\n"
+
+def format_range_response(fmt, lmp_rows, constraint_rows, resolution="hour", band_rows=None):
+    if fmt == "ndjson":
+        if band_rows:
+            lmp_rows = [(*row, *bands[2:]) for row, bands in zip(lmp_rows, band_rows)]
+        lines = [meta_ndjson_line(resolution)]
+        lines += [lmp_ndjson_line(row) for row in lmp_rows] + [constraint_ndjson_line(row) for row in constraint_rows]
+        lines.append(json.dumps({"type": "end"}) + "\n")
+        return StreamingResponse(iter(lines), media_type="application/x-ndjson")
+    if fmt == "columnar":
+        return dict(build_columnar_response(lmp_rows, constraint_rows, band_rows), resolution=resolution)
+    if fmt == "arrow":
+        return build_arrow_response(lmp_rows, constraint_rows, resolution, band_rows)
+    return dict(build_json_response(lmp_rows, constraint_rows, band_rows), resolution=resolution)
+
+# --- Downsampling ---
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+# The max and min envelope of each metric need 3 points apiece for LTTB
+DOWNSAMPLE_MIN_POINTS = 3 * 2 * len(PRICE_METRICS)
+
+def lttb_indices(y, n_out):
+    """
+    Largest-Triangle-Three-Buckets over a single series, vectorized across buckets by
+    using the neighbouring buckets' averages as the triangle's other two corners (the
+    sequential form uses the previously *selected* point). Always keeps both endpoints.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64)
+    filled = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # interior buckets [edges[i], edges[i+1])
+    starts, counts = edges[:-1], np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], starts - 1) / counts
+    avg_y = np.add.reduceat(filled[1:n - 1], starts - 1) / counts
+    prev_x, prev_y = np.r_[x[0], avg_x[:-1]], np.r_[filled[0], avg_y[:-1]]
+    next_x, next_y = np.r_[avg_x[1:], x[-1]], np.r_[avg_y[1:], filled[-1]]
+
+    bucket = np.repeat(np.arange(len(starts)), counts)
+    px, py = x[1:n - 1], y[1:n - 1]
+    area = np.abs((prev_x[bucket] - next_x[bucket]) * (py - prev_y[bucket]) - (prev_x[bucket] - px) * (next_y[bucket] - prev_y[bucket]))
+    area = np.where(np.isnan(area), -1.0, area)
+    order = np.lexsort((-area, bucket))  # per bucket, largest area first
+    return np.r_[0, order[starts - 1] + 1, n - 1]
+
+def minmax_indices(y, n_out):
+    """Min/max envelope: the lowest and highest point of each of (n_out - 2) // 2 buckets, plus both endpoints."""
+    n = len(y)
+    if n <= n_out or n_out < 2:
+        return np.arange(n)
+    edges = np.linspace(0, n, max(1, (n_out - 2) // 2) + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+    lows = np.lexsort((np.where(np.isnan(y), np.inf, y), bucket))[edges[:-1]]
+    highs = np.lexsort((np.where(np.isnan(y), -np.inf, y), bucket))[edges[1:] - 1]
+    return np.unique(np.r_[0, lows, highs, n - 1])
+
+def downsample_zone_rows(lmp_rows, max_points, method):
+    """
+    Returns the positions of lmp_rows to keep so that at most max_points
+    timestamps remain, the same ones for every zone (so the columnar grid shrinks
+    with them). The picker runs on the cross-zone max and min of da/rt/net, with the
+    budget split across those six envelopes, so a spike in any zone's series survives.
+    """
+    if not lmp_rows:
+        return []
+    pick = lttb_indices if method == "lttb" else minmax_indices
+    zones, zone_idx = np.unique(np.array([row[0] for row in lmp_rows]), return_inverse=True)
+    times, time_idx = np.unique(np.array([row[1] for row in lmp_rows], dtype="datetime64[s]"), return_inverse=True)
+    if len(times) <= max_points:
+        return list(range(len(lmp_rows)))
+
+    grid = np.full((len(zones), len(times), len(PRICE_METRICS)), np.nan)
+    grid[zone_idx, time_idx] = np.array([row[2:5] for row in lmp_rows], dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # hours no zone has a reading for
+        envelopes = [np.nanmax(grid, axis=0), np.nanmin(grid, axis=0)]
+
+    per_series = max(3, max_points // (2 * len(PRICE_METRICS)))
+    picked = np.unique(np.concatenate([
+        pick(envelope[:, m], per_series) for envelope in envelopes for m in range(len(PRICE_METRICS))
+    ]))
+    if len(picked) > max_points:  # only below DOWNSAMPLE_MIN_POINTS, where the per-series floor wins
+        picked = picked[np.linspace(0, len(picked) - 1, max_points).astype(np.int64)]
+    keep = np.zeros(len(times), dtype=bool)
+    keep[picked] = True
+    return np.flatnonzero(keep[time_idx]).tolist()
+
+def downsample_range_result(result, max_points, method):
+    """Applies downsample_zone_rows to a cached (lmp_rows, constraint_rows, resolution, band_rows) tuple."""
+    lmp_rows, constraint_rows, resolution, band_rows = result
+    keep = downsample_zone_rows(lmp_rows, max_points, method)
+    if len(keep) == len(lmp_rows):
+        return result
+    return (
+        [lmp_rows[i] for i in keep],
+        constraint_rows,
+        resolution,
+        [band_rows[i] for i in keep] if band_rows else band_rows,
+    )
+
+# --- Rollup Resolutions ---
+
+RANGE_RESOLUTIONS = ("auto", "hour", "day", "week", "month")
+ROLLUP_TABLES = {"day": "pjm_zone_daily_lmps", "week": "pjm_zone_weekly_lmps", "month": "pjm_zone_monthly_lmps"}
+ROLLUP_BAND_COLUMNS = ("da_min", "da_max", "da_std", "rt_min", "rt_max", "rt_std", "net_min", "net_max", "net_std")
+# Largest span (days) served at each resolution when resolution="auto"; longer spans get months
+AUTO_RESOLUTION_SPANS = ((31, "hour"), (366, "day"), (3 * 366, "week"))
+
+def rollup_period_sql(resolution, column):
+    """SQL for the rollup period containing a DATETIME column (matches the hydrate rollup keys)."""
+    if resolution == "day":
+        return f"CAST(DATE({column}) AS DATETIME)"
+    if resolution == "week":
+        return f"CAST(DATE_SUB(DATE({column}), INTERVAL WEEKDAY({column}) DAY) AS DATETIME)"
+    return f"CAST(DATE_FORMAT({column}, '%Y-%m-01') AS DATETIME)"
+
+def rollup_period_floor(resolution, dt):
+    day = dt.date()
+    if resolution == "week":
+        day -= timedelta(days=day.weekday())
+    elif resolution == "month":
+        day = day.replace(day=1)
+    return datetime.combine(day, datetime.min.time())
+
+def is_unfiltered_range(params):
+    """Rollups hold whole periods, so they only answer ranges with no hour, weekday or constraint filter."""
+    return (
+        set(params["hours"]) == set(range(24))
+        and set(params["days_of_week"]) == set(ALL_DAYS_OF_WEEK)
+        and not params.get("monitored_facility")
+    )
+
+def resolve_resolution(requested, params):
+    if requested != "auto":
+        if requested != "hour" and not is_unfiltered_range(params):
+            raise HTTPException(status_code=400, detail=f"resolution '{requested}' cannot apply hour, weekday or constraint filters; use 'hour' or 'auto'.")
+        return requested
+    if not is_unfiltered_range(params):
+        return "hour"
+    span_days = (params["end_dt"] - params["start_dt"]).days
+    for max_days, resolution in AUTO_RESOLUTION_SPANS:
+        if span_days <= max_days:
+            return resolution
+    return "month"
+
+def build_range_filters(query: LmpRangeQuery):
+    """
+    Builds the FROM/WHERE clauses shared by every LMP (alias zh) and constraint (alias bc)
+    query over a range filter. Returns None when the hour window is empty.
+    """
+    # Params
+    params = {}
+    start_datetime_obj = datetime.strptime(query.start_day, '%Y-%m-%d')
+    end_datetime_obj = datetime.strptime(query.end_day, '%Y-%m-%d') + timedelta(days=1)
+    params["start_dt"] = start_datetime_obj
+    params["end_dt"] = end_datetime_obj
+
+    # Hour and weekday filters are expanded into IN-lists on the stored calendar
+    # columns so MySQL can seek the (dow, hour_of_day, datetime) index.
+    start_hour = query.start_hour if query.start_hour is not None else 0
+    end_hour = query.end_hour if query.end_hour is not None else 24
+    hours = tuple(range(max(start_hour, 0), min(end_hour, 24)))
+    if not hours:
+        return None
+    params["hours"] = hours
+    params["days_of_week"] = tuple(query.days_of_week) if query.days_of_week else ALL_DAYS_OF_WEEK
+
+    # Selected Constraint Filter: restrict to hours where the constraint was binding,
+    # via the (monitored_facility, hour_beginning) index maintained by the constraint ingest
+    lmp_join = ""
+    constraints_join = ""
+    if query.monitored_facility:
+        lmp_join = """
+        JOIN
+            pjm_constraint_hours AS ch ON ch.monitored_facility = :monitored_facility
+            AND ch.hour_beginning = zh.datetime_beginning_ept
+        """
+        constraints_join = """
+        JOIN
+            pjm_constraint_hours AS ch ON ch.monitored_facility = :monitored_facility
+            AND ch.hour_beginning = bc.hour_bucket
+        """
+        params["monitored_facility"] = query.monitored_facility
+
+    # LMP source (pre-aggregated zone-hour table, kept current by the hydrate scripts)
+    lmp_from_where = f"""
+        FROM
+            pjm_zone_hrl_lmps AS zh
+        {lmp_join}
+        WHERE
+            zh.dow IN :days_of_week
+            AND zh.hour_of_day IN :hours
+            AND zh.datetime_beginning_ept >= :start_dt AND zh.datetime_beginning_ept < :end_dt
+    """
+
+    # Constraints source
+    constraints_from_where = f"""
+        FROM
+            electric_data.pjm_binding_constraints AS bc
+        {constraints_join}
+        WHERE
+            bc.dow IN :days_of_week
+            AND bc.hour_of_day IN :hours
+            AND bc.datetime_beginning_ept >= :start_dt AND bc.datetime_beginning_ept < :end_dt
+    """
+
+    return lmp_from_where, constraints_from_where, params
+
+def build_range_queries(query: LmpRangeQuery):
+    """
+    Builds the LMP and constraint SQL for a range query at its resolved resolution.
+    Returns None when the hour window is empty, else (lmp_sql, constraints_sql, params, resolution).
+    Rollup LMP rows carry ROLLUP_BAND_COLUMNS after the three means; partial periods
+    at either end of the range are returned whole.
+    """
+    filters = build_range_filters(query)
+    if filters is None:
+        return None
+    lmp_from_where, constraints_from_where, params = filters
+
+    resolution = resolve_resolution(query.resolution, params)
+    if resolution != "hour":
+        params["period_start_dt"] = rollup_period_floor(resolution, params["start_dt"])
+        lmp_query_str = f"""
+            SELECT
+                r.Transact_Z,
+                CAST(r.period_start AS DATETIME) AS period_start,
+                r.da_mean,
+                r.rt_mean,
+                r.net_mean,
+                {", ".join(f"r.{column}" for column in ROLLUP_BAND_COLUMNS)}
+            FROM
+                {ROLLUP_TABLES[resolution]} AS r
+            WHERE
+                r.period_start >= :period_start_dt AND r.period_start < :end_dt
+            ORDER BY r.Transact_Z, r.period_start;
+        """
+        constraints_query_str = f"""
+            SELECT
+                {rollup_period_sql(resolution, "bc.hour_bucket")} AS hour_beginning,
+                bc.monitored_facility,
+                ROUND(SUM(bc.shadow_price) / 12, 2) AS shadow_price
+            {constraints_from_where}
+            GROUP BY hour_beginning, bc.monitored_facility
+            ORDER BY hour_beginning, bc.monitored_facility;
+        """
+        return lmp_query_str, constraints_query_str, params, resolution
+
+    # LMP Query
+    lmp_query_str = f"""
+        SELECT
+            zh.Transact_Z,
+            zh.datetime_beginning_ept,
+            zh.lmp_da,
+            zh.lmp_rt,
+            zh.lmp_net
+        {lmp_from_where}
+        ORDER BY zh.Transact_Z, zh.datetime_beginning_ept;
+    """
+
+    # Constraints Query
+    constraints_query_str = f"""
+        SELECT
+            bc.hour_bucket AS hour_beginning,
+            bc.monitored_facility,
+            ROUND(SUM(bc.shadow_price) / 12, 2) AS shadow_price
+        {constraints_from_where}
+        GROUP BY hour_beginning, bc.monitored_facility
+        ORDER BY hour_beginning, bc.monitored_facility;
+    """
+
+    return lmp_query_str, constraints_query_str, params, resolution
+
+# --- Zone Shapes Cache ---
+
+# Simplification tolerances (degrees) for the ?detail= levels; None serves the raw shapes.
+ZONE_DETAIL_TOLERANCES = {"full": None, "medium": 0.005, "low": 0.02}
+ZONE_SHAPES_REFRESH_SECONDS = int(os.getenv("ZONE_SHAPES_REFRESH_SECONDS", 3600))
+
+def encode_zone_collection(rows):
+    """Serializes a FeatureCollection once and pre-compresses it; the geometry JSON from MySQL is spliced in as-is."""
+    features = [
+        '{"type":"Feature","geometry":' + geometry_geojson + ',"properties":' + json.dumps({"zone_name": zone_name}) + '}'
+        for zone_name, geometry_geojson in rows if geometry_geojson
+    ]
+    body = ('{"type":"FeatureCollection","features":[' + ",".join(features) + ']}').encode("utf-8")
+    return {
+        "feature_count": len(features),
+        "body": body,
+        "gzip": gzip.compress(body, compresslevel=9),
+        "br": brotli.compress(body) if brotli else None,
+        "etag": '"' + hashlib.sha1(body).hexdigest() + '"',
+    }
+
+class ZoneShapeCache:
+    """
+    In-memory FeatureCollections for every detail level. Shapes almost never change,
+    so the table checksum is re-read at most every ZONE_SHAPES_REFRESH_SECONDS and the
+    collections are only rebuilt when it moves.
+    """
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self.entries = {}
+        self.checksum = None
+        self.checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self):
+        return not self.entries or time.monotonic() - self.checked_at > self.refresh_seconds
+
+    async def get(self, detail):
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    try:
+                        await self._refresh()
+                    except Exception as e:
+                        if not self.entries:
+                            raise
+                        print(f"Zone shape refresh failed, serving cached shapes: {e}")
+        return self.entries.get(detail)
+
+    async def _refresh(self):
+        async with checkout() as conn:
+            checksum = (await conn.execute(text("CHECKSUM TABLE pjm_zone_shapes"))).fetchone()[1]
+            if checksum != self.checksum or not self.entries:
+                entries = {}
+                for detail, tolerance in ZONE_DETAIL_TOLERANCES.items():
+                    if tolerance is None:
+                        geometry_sql = "ST_AsGeoJSON(ST_GeomFromText(WKT))"
+                    else:
+                        geometry_sql = f"ST_AsGeoJSON(ST_Simplify(ST_GeomFromText(WKT), {tolerance}), 5)"
+                    result = await conn.execute(text(f"""
+                        SELECT Transact_Z, {geometry_sql} as geometry_geojson
+                        FROM pjm_zone_shapes
+                        WHERE WKT IS NOT NULL
+                    """))
+                    entries[detail] = await asyncio.to_thread(encode_zone_collection, result.fetchall())
+                self.entries = entries
+                self.checksum = checksum
+        self.checked_at = time.monotonic()
+
+zone_shape_cache = ZoneShapeCache(ZONE_SHAPES_REFRESH_SECONDS)
 
 # PJM Zone Shapes Endpoint
 @app.get("/api/zones")
-def get_zones(db: Session = Depends(get_db)):
+async def get_zones(request: Request, detail: str = "full"):
+    if detail not in ZONE_DETAIL_TOLERANCES:
+        raise HTTPException(status_code=400, detail=f"Unknown detail '{detail}'. Use one of: {', '.join(ZONE_DETAIL_TOLERANCES)}.")
     try:
-        shape_query = text("""
-            SELECT Transact_Z, ST_AsGeoJSON(ST_GeomFromText(WKT)) as geometry_geojson
-            FROM pjm_zone_shapes
-            WHERE WKT IS NOT NULL
-        """)
-        shape_result = db.execute(shape_query)
-        features = []
-        for zone_shape_row in shape_result.fetchall():
-            row_dict = zone_shape_row._asdict()
-            feature = {
-                "type": "Feature",
-                "geometry": json.loads(row_dict['geometry_geojson']),
-                "properties": {"zone_name": row_dict['Transact_Z']}
-            }
-            features.append(feature)
-        if not features:
+        entry = await zone_shape_cache.get(detail)
+        if not entry or entry["feature_count"] == 0:
             raise HTTPException(status_code=404, detail="No zone shapes found.")
-        return {"type": "FeatureCollection", "features": features}
+
+        headers = {"ETag": entry["etag"], "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if entry["etag"] in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        accept_encoding = request.headers.get("accept-encoding", "")
+        content = entry["body"]
+        if "br" in accept_encoding and entry["br"] is not None:
+            content = entry["br"]
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accept_encoding:
+            content = entry["gzip"]
+            headers["Content-Encoding"] = "gzip"
+        return Response(content=content, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"An unexpected server error occurred while fetching zones: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
+def format_downsampled_response(query: LmpRangeQuery, result):
+    """The full-resolution result is what gets cached; downsampling happens per request."""
+    if query.max_points is not None:
+        result = downsample_range_result(result, query.max_points, query.downsample)
+    return format_range_response(query.format, *result)
+
 @app.post("/api/lmp/range")
-def get_lmp_data_for_range(query: LmpRangeQuery, db: Session = Depends(get_db)):
+async def get_lmp_data_for_range(query: LmpRangeQuery):
+    if query.format not in RANGE_RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{query.format}'. Use one of: {', '.join(RANGE_RESPONSE_FORMATS)}.")
+    if query.format == "arrow" and pa is None:
+        raise HTTPException(status_code=400, detail="The arrow format requires pyarrow on the server.")
+    if query.resolution not in RANGE_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution '{query.resolution}'. Use one of: {', '.join(RANGE_RESOLUTIONS)}.")
+    if query.max_points is not None:
+        if query.downsample not in DOWNSAMPLE_METHODS:
+            raise HTTPException(status_code=400, detail=f"Unknown downsample '{query.downsample}'. Use one of: {', '.join(DOWNSAMPLE_METHODS)}.")
+        if query.max_points < DOWNSAMPLE_MIN_POINTS:
+            raise HTTPException(status_code=422, detail=f"max_points must be at least {DOWNSAMPLE_MIN_POINTS}.")
+        if query.format == "ndjson":
+            raise HTTPException(status_code=400, detail="max_points is not supported with the ndjson format.")
     try:
-        # Params
-        params = {}
-        start_datetime_obj = datetime.strptime(query.start_day, '%Y-%m-%d')
-        end_datetime_obj = datetime.strptime(query.end_day, '%Y-%m-%d') + timedelta(days=1)
-        params["start_dt"] = start_datetime_obj
-        params["end_dt"] = end_datetime_obj
-        params["start_hour"] = query.start_hour
-        params["end_hour"] = query.end_hour
-
-        # LMP Query 
-        lmp_query_str = """
-            SELECT
-                z.Transact_Z,
-                da.datetime_beginning_ept,
-                da.total_lmp_da AS lmp_da,
-                rt.total_lmp_rt AS lmp_rt,
-                (rt.total_lmp_rt - da.total_lmp_da) AS lmp_net
-            FROM
-                pjm_da_hrl_lmps AS da
-            JOIN
-                pjm_rt_hrl_lmps AS rt ON da.pnode_name = rt.pnode_name AND da.datetime_beginning_ept = rt.datetime_beginning_ept
-            JOIN
-                pjm_lat_long AS ll ON da.pnode_name = ll.Alt_Name
-            JOIN
-                pjm_zone_shapes AS z ON ll.Transact_Z = z.Transact_Z
-            WHERE
-                da.datetime_beginning_ept >= :start_dt AND da.datetime_beginning_ept < :end_dt
-                AND EXTRACT(HOUR FROM da.datetime_beginning_ept) >= :start_hour
-                AND EXTRACT(HOUR FROM da.datetime_beginning_ept) < :end_hour
-        """
+        range_queries = build_range_queries(query)
+        if range_queries is None:
+            return format_range_response(query.format, [], [])
+        lmp_query_str, constraints_query_str, params, resolution = range_queries
 
-        # Constraints Query
-        constraints_query_str = """
-            SELECT
-                DATE_FORMAT(datetime_beginning_ept, '%Y-%m-%d %H:00:00') AS hour_beginning,
-                monitored_facility,
-                ROUND(SUM(shadow_price) / 12, 2) AS shadow_price
-            FROM
-                electric_data.pjm_binding_constraints
-            WHERE
-                datetime_beginning_ept >= :start_dt AND datetime_beginning_ept < :end_dt
-                AND EXTRACT(HOUR FROM datetime_beginning_ept) >= :start_hour
-                AND EXTRACT(HOUR FROM datetime_beginning_ept) < :end_hour
-        """
+        # Streaming mode: rows are written as they come off a server-side cursor
+        if query.format == "ndjson":
+            return StreamingResponse(stream_range_ndjson(lmp_query_str, constraints_query_str, params, resolution), media_type="application/x-ndjson")
 
-        # --- DYNAMIC FILTERS ---
-
-        # Day of Week Filter
-        if query.days_of_week:
-            dow_clause_da = " AND DAYOFWEEK(da.datetime_beginning_ept) IN :days_of_week"
-            dow_clause_con = " AND DAYOFWEEK(datetime_beginning_ept) IN :days_of_week"
-            
-            lmp_query_str += dow_clause_da
-            constraints_query_str += dow_clause_con
-            
-            params["days_of_week"] = tuple(query.days_of_week)
-
-        # Selected Constraint Filter
-        if query.monitored_facility:
-            subquery = """
-                SELECT DISTINCT DATE_FORMAT(datetime_beginning_ept, '%Y-%m-%d %H:00:00')
-                FROM electric_data.pjm_binding_constraints
-                WHERE monitored_facility = :monitored_facility
-            """
-            
-            # Show LMP only for hours where constraint existed
-            lmp_query_str += f" AND da.datetime_beginning_ept IN ({subquery})"
-            constraints_query_str += f" AND DATE_FORMAT(datetime_beginning_ept, '%Y-%m-%d %H:00:00') IN ({subquery})"
-            params["monitored_facility"] = query.monitored_facility
-
-        # Order and Group
-        lmp_query_str += " ORDER BY z.Transact_Z, da.datetime_beginning_ept;"
-        constraints_query_str += " GROUP BY hour_beginning, monitored_facility ORDER BY hour_beginning, monitored_facility;"
-
-        # Execute Queries
-        lmp_result = db.execute(text(lmp_query_str), params)
-        constraints_result = db.execute(text(constraints_query_str), params)
-
-        # LMP Data Processing
-        lmp_data_by_zone = collections.defaultdict(list)
-        lmp_rows = lmp_result.fetchall()
-        
-        if lmp_rows:
-            for row in lmp_rows:
-                row_dict = row._asdict()
-                lmp_data_by_zone[row_dict['Transact_Z']].append({
-                    "datetime_beginning_ept": row_dict['datetime_beginning_ept'].isoformat(),
-                    "lmp_values": {
-                        "da": row_dict['lmp_da'],
-                        "rt": row_dict['lmp_rt'],
-                        "net": row_dict['lmp_net']
-                    }
-                })
-
-        # Constraints Data Processing
-        constraints_data = []
-        constraint_rows = constraints_result.fetchall()
-
-        for row in constraint_rows:
-            row_dict = row._asdict()
-            constraints_data.append({
-                "name": row_dict['monitored_facility'],
-                "timestamp": str(row_dict['hour_beginning']), 
-                "shadow_price": row_dict['shadow_price'] 
-            })
-
-        # Response
-        return {
-            "zones": lmp_data_by_zone,
-            "constraints": constraints_data
-        }
+        cache_key = range_cache_key(f"range:{resolution}", params)
+        cached = await asyncio.to_thread(result_cache.get, cache_key)
+        if cached is not None:
+            return await asyncio.to_thread(format_downsampled_response, query, cached)
 
+        # Execute Queries concurrently, each on its own connection
+        lmp_rows, constraint_rows, stable = await asyncio.gather(
+            fetch_rows(lmp_query_str, params),
+            fetch_rows(constraints_query_str, params),
+            is_range_verified(params["start_dt"], params["end_dt"]),
+        )
+        band_rows = None
+        if resolution != "hour":
+            band_rows = [(row[0], row[1], *row[5:]) for row in lmp_rows]
+            lmp_rows = [row[:5] for row in lmp_rows]
+        cached = (lmp_rows, constraint_rows, resolution, band_rows)
+        # An empty result may just mean the zone table has not been built yet; never pin it
+        await asyncio.to_thread(result_cache.put, cache_key, cached, stable and bool(lmp_rows))
+
+        # Response (formatting is CPU-bound, keep it off the event loop)
+        return await asyncio.to_thread(format_downsampled_response, query, cached)
+
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Please use YYYY-MM-DD.")
     except Exception as e:
         print(f"An unexpected server error occurred while fetching LMP data: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred processing your request.")
+
+# --- Range Summary ---
+
+def finite_or_none(value):
+    return None if value is None or not math.isfinite(value) else round(float(value), 4)
+
+def summarize_zone_prices(rows, percentiles):
+    """
+    Per-zone count/mean/min/max/percentiles of da/rt/net over (zone, da, rt, net) rows.
+    Rows are grouped once by zone index; sums and extrema are single vectorized passes.
+    """
+    if not rows:
+        return {}
+    zone_names = np.array([row[0] for row in rows])
+    values = np.array([row[1:] for row in rows], dtype=np.float64)  # None -> NaN
+
+    zones, inverse = np.unique(zone_names, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    grouped = values[order]
+    starts = np.searchsorted(inverse[order], np.arange(len(zones)))
+    ends = np.append(starts[1:], len(rows))
+
+    valid = ~np.isnan(values)
+    counts = np.stack([np.bincount(inverse, weights=valid[:, m], minlength=len(zones)) for m in range(3)], axis=1)
+    sums = np.stack([np.bincount(inverse, weights=np.where(valid[:, m], values[:, m], 0.0), minlength=len(zones)) for m in range(3)], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = sums / counts
+        mins = np.fmin.reduceat(grouped, starts, axis=0)
+        maxs = np.fmax.reduceat(grouped, starts, axis=0)
+        pcts = np.stack([np.nanpercentile(grouped[a:b], percentiles, axis=0) for a, b in zip(starts, ends)])
+
+    summary = {}
+    for z, zone in enumerate(zones):
+        zone_summary = {"count": int(ends[z] - starts[z])}
+        for m, metric in enumerate(PRICE_METRICS):
+            stats = {"mean": finite_or_none(means[z, m]), "min": finite_or_none(mins[z, m]), "max": finite_or_none(maxs[z, m])}
+            for p, pct in enumerate(percentiles):
+                stats[f"p{pct:g}"] = finite_or_none(pcts[z, p, m])
+            zone_summary[metric] = stats
+        summary[str(zone)] = zone_summary
+    return summary
+
+def build_summary_response(lmp_rows, n_hours, constraint_rows, percentiles):
+    return {
+        "hours": n_hours,
+        "zones": summarize_zone_prices(lmp_rows, percentiles),
+        "constraints": [
+            {"name": name, "total": finite_or_none(total), "price": finite_or_none(float(total) / (n_hours or 1))}
+            for name, total in constraint_rows if total is not None
+        ],
+    }
+
+@app.post("/api/lmp/summary")
+async def get_lmp_summary(query: LmpSummaryQuery):
+    """Per-zone price statistics and the top-N constraint shadow-price totals, without the hourly series."""
+    if not 1 <= query.top_n <= 500:
+        raise HTTPException(status_code=400, detail="top_n must be between 1 and 500.")
+    if any(not 0 <= p <= 100 for p in query.percentiles):
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100.")
+    try:
+        filters = build_range_filters(query)
+        if filters is None:
+            return build_summary_response([], 0, [], query.percentiles)
+        lmp_from_where, constraints_from_where, params = filters
+
+        cache_key = range_cache_key(f"summary:{query.top_n}:{query.percentiles}", params)
+        cached = await asyncio.to_thread(result_cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+        (lmp_rows, hour_rows, constraint_rows), stable = await asyncio.gather(
+            fetch_rows_batch([
+                (f"SELECT zh.Transact_Z, zh.lmp_da, zh.lmp_rt, zh.lmp_net {lmp_from_where}", params),
+                (f"SELECT COUNT(DISTINCT zh.datetime_beginning_ept) {lmp_from_where}", params),
+                (f"""
+                    SELECT bc.monitored_facility, SUM(bc.shadow_price) / 12 AS total
+                    {constraints_from_where}
+                    GROUP BY bc.monitored_facility
+                    ORDER BY total ASC
+                    LIMIT :top_n
+                """, dict(params, top_n=query.top_n)),
+            ]),
+            is_range_verified(params["start_dt"], params["end_dt"]),
+        )
+        n_hours = int(hour_rows[0][0]) if hour_rows else 0
+        summary = await asyncio.to_thread(build_summary_response, lmp_rows, n_hours, constraint_rows, query.percentiles)
+        await asyncio.to_thread(result_cache.put, cache_key, summary, stable and bool(lmp_rows))
+        return summary
+
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Please use YYYY-MM-DD.")
+    except Exception as e:
+        print(f"An unexpected server error occurred while summarizing LMP data: {e}")
+        raise HTTPException(status_code=500, detail="An internal server error occurred processing your request.")
     
+# --- Congestion Deltas ---
+
+CONGESTION_AGGREGATES = ("mean", "hourly")
+# Largest hours x load x remote array aggregate="hourly" will build (float32 cells)
+CONGESTION_HOURLY_MAX_CELLS = int(os.getenv("CONGESTION_HOURLY_MAX_CELLS", 5_000_000))
+
+def build_rt_grid(rows):
+    """(zone, ts, rt) rows -> (zones, timestamps, hours x zones float64 array with NaN gaps)."""
+    zones, zone_idx = np.unique(np.array([row[0] for row in rows]), return_inverse=True)
+    timestamps = sorted({row[1] for row in rows})
+    time_index = {ts: i for i, ts in enumerate(timestamps)}
+    grid = np.full((len(timestamps), len(zones)), np.nan)
+    grid[[time_index[row[1]] for row in rows], zone_idx] = np.array([row[2] for row in rows], dtype=np.float64)
+    return [str(zone) for zone in zones], timestamps, grid
+
+def build_congestion_response(rows, aggregate, load_zone):
+    """
+    RT congestion deltas (load zone RT minus remote zone RT). With no load_zone the
+    full zone x zone matrix is returned, deltas[load][remote]; with one, a single row.
+    "mean" averages over the filtered hours; "hourly" keeps the hour axis and ships
+    it as a little-endian float32 base64 array of the given shape, up to
+    CONGESTION_HOURLY_MAX_CELLS cells.
+    """
+    if not rows:
+        return {"aggregate": aggregate, "load_zone": load_zone, "zones": [], "hours": 0, "shape": [0], "deltas": []}
+    zones, timestamps, rt = build_rt_grid(rows)
+    load = None
+    if load_zone is not None:
+        if load_zone not in zones:
+            raise HTTPException(status_code=404, detail=f"No RT prices for load zone '{load_zone}' in this range.")
+        load = zones.index(load_zone)
+
+    response = {"aggregate": aggregate, "load_zone": load_zone, "zones": zones, "hours": len(timestamps)}
+    if aggregate == "mean":
+        # mean(a - b) over hours both have = (sum(a * m_b) - sum(b * m_a)) / n_ab, from zone x zone
+        # products of the hours x zones grid, so memory stays O(zones^2) for any range
+        present = np.isfinite(rt).astype(np.float64)
+        filled = np.where(present > 0, rt, 0.0)
+        sums = filled.T @ present     # [a, b] = sum of a's prices over hours b also has
+        counts = present.T @ present  # [a, b] = hours both have
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (sums - sums.T) / counts
+        if load is not None:
+            mean = mean[load]
+        response["shape"] = list(mean.shape)
+        response["deltas"] = np.where(np.isfinite(mean), np.round(mean, 4), None).tolist()
+    else:
+        n_cells = len(timestamps) * len(zones) * (1 if load is not None else len(zones))
+        if n_cells > CONGESTION_HOURLY_MAX_CELLS:
+            raise HTTPException(status_code=400, detail=(
+                f"aggregate=hourly over {len(timestamps)} hours and {len(zones)} zones is too large; "
+                "narrow the range, pass a load_zone, or use aggregate=mean."
+            ))
+        if load is not None:
+            deltas = rt[:, [load]] - rt  # hours x remote
+        else:
+            deltas = rt[:, :, None] - rt[:, None, :]  # hours x load x remote
+        response["timestamps"] = [ts.isoformat() for ts in timestamps]
+        response["shape"] = list(deltas.shape)
+        response["deltas"] = base64.b64encode(deltas.astype("<f4").tobytes()).decode("ascii")
+    return response
+
+@app.post("/api/lmp/congestion")
+async def get_lmp_congestion(query: LmpCongestionQuery):
+    """Zone-by-zone RT congestion deltas for the filtered hours, per hour or averaged."""
+    if query.aggregate not in CONGESTION_AGGREGATES:
+        raise HTTPException(status_code=400, detail=f"aggregate must be one of {', '.join(CONGESTION_AGGREGATES)}.")
+    try:
+        filters = build_range_filters(query)
+        if filters is None:
+            return build_congestion_response([], query.aggregate, query.load_zone)
+        lmp_from_where, _, params = filters
+
+        cache_key = range_cache_key(f"congestion:{query.aggregate}:{query.load_zone}", params)
+        cached = await asyncio.to_thread(result_cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+        rows, stable = await asyncio.gather(
+            fetch_rows(f"SELECT zh.Transact_Z, zh.datetime_beginning_ept, zh.lmp_rt {lmp_from_where}", params),
+            is_range_verified(params["start_dt"], params["end_dt"]),
+        )
+        response = await asyncio.to_thread(build_congestion_response, rows, query.aggregate, query.load_zone)
+        await asyncio.to_thread(result_cache.put, cache_key, response, stable and bool(rows))
+        return response
+
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Please use YYYY-MM-DD.")
+    except Exception as e:
+        print(f"An unexpected server error occurred while computing congestion deltas: {e}")
+        raise HTTPException(status_code=500, detail="An internal server error occurred processing your request.")
+
+# --- Like-Day Similarity Index ---
+
+DAY_INDEX_METRICS = ("da", "rt", "net")
+DAY_INDEX_REFRESH_SECONDS = int(os.getenv("DAY_INDEX_REFRESH_SECONDS", 900))
+DAY_INDEX_RELOAD_DAYS = int(os.getenv("DAY_INDEX_RELOAD_DAYS", 14))
+
+class DayProfileIndex:
+    """
+    Every day in the zone-hour table as a (metric x hour x zone) float32 block, stacked
+    into one array so a query is a single vectorized distance pass. After the first full
+    load only the trailing DAY_INDEX_RELOAD_DAYS are re-read (where late verified RT
+    prices land), on a timer or when the ingest scripts call /api/cache/invalidate.
+    """
+    def __init__(self, refresh_seconds, reload_days):
+        self.refresh_seconds = refresh_seconds
+        self.reload_days = reload_days
+        # (days, zones, profiles) swapped as one tuple so searches never see a half-merged index
+        self.snapshot = ([], [], np.empty((0, len(DAY_INDEX_METRICS), 24, 0), dtype=np.float32))
+        self.loaded_at = None
+        self.full_reload = False
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, since=None):
+        """Forces a refresh; one reaching back past the trailing reload window reloads every day."""
+        days = self.snapshot[0]
+        if since is not None and days and since.date() < days[-1] - timedelta(days=self.reload_days):
+            self.full_reload = True
+        self.loaded_at = None
+
+    def _is_stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_seconds
+
+    async def get(self):
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    days = self.snapshot[0]
+                    since = days[-1] - timedelta(days=self.reload_days) if days and not self.full_reload else None
+                    self.full_reload = False
+                    where = "WHERE datetime_beginning_ept >= :since" if since else ""
+                    rows = await fetch_rows(f"""
+                        SELECT DATE(datetime_beginning_ept) AS day, hour_of_day, Transact_Z,
+                               AVG(lmp_da), AVG(lmp_rt), AVG(lmp_net)
+                        FROM pjm_zone_hrl_lmps
+                        {where}
+                        GROUP BY day, hour_of_day, Transact_Z
+                    """, {"since": since})
+                    await asyncio.to_thread(self._merge, rows, since)
+                    self.loaded_at = time.monotonic()
+        return self
+
+    def _merge(self, rows, since):
+        """Replaces every day >= since with the freshly loaded rows (DST repeat hours are averaged)."""
+        days, zones, profiles = self.snapshot
+        keep = bisect_left(days, since) if since else 0
+        new_days = sorted({row[0] for row in rows})
+        all_zones = sorted(set(zones) | {row[2] for row in rows})
+
+        kept = profiles[:keep]
+        if all_zones != zones:
+            zone_pos = {zone: i for i, zone in enumerate(all_zones)}
+            widened = np.full(kept.shape[:3] + (len(all_zones),), np.nan, dtype=np.float32)
+            widened[..., [zone_pos[zone] for zone in zones]] = kept
+            kept = widened
+
+        block = np.full((len(new_days), len(DAY_INDEX_METRICS), 24, len(all_zones)), np.nan, dtype=np.float32)
+        if rows:
+            day_pos = {day: i for i, day in enumerate(new_days)}
+            zone_pos = {zone: i for i, zone in enumerate(all_zones)}
+            block[
+                [day_pos[row[0]] for row in rows], :,
+                [int(row[1]) for row in rows],
+                [zone_pos[row[2]] for row in rows],
+            ] = np.array([row[3:] for row in rows], dtype=np.float32)
+
+        self.snapshot = (days[:keep] + new_days, all_zones, np.concatenate([kept, block]))
+
+    def search(self, target_day, metric, k, zones, days_of_week, exclude_days):
+        days, all_zones, profiles = self.snapshot
+        t = bisect_left(days, target_day)
+        if t == len(days) or days[t] != target_day:
+            raise HTTPException(status_code=404, detail=f"No prices indexed for {target_day.isoformat()}.")
+
+        columns = [i for i, zone in enumerate(all_zones) if zones is None or zone in zones]
+        if not columns:
+            raise HTTPException(status_code=400, detail="None of the requested zones are indexed.")
+        vectors = profiles[:, DAY_INDEX_METRICS.index(metric)][:, :, columns].reshape(len(days), -1)
+        target = vectors[t]
+
+        # RMS $/MWh difference over the hour-zone cells both days have
+        valid = ~np.isnan(vectors) & ~np.isnan(target)
+        diff = np.where(valid, vectors - target, 0.0)
+        overlap = valid.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            distance = np.sqrt(np.einsum("ij,ij->i", diff, diff) / overlap)
+        distance[overlap < max(1, valid[t].sum() // 2)] = np.inf
+
+        day_numbers = np.array(days, dtype="datetime64[D]").astype(np.int64)
+        dow = (day_numbers + 4) % 7 + 1  # MySQL DAYOFWEEK: 1 = Sunday
+        distance[~np.isin(dow, days_of_week)] = np.inf
+        distance[np.abs(day_numbers - day_numbers[t]) <= exclude_days] = np.inf
+
+        k = min(k, int(np.isfinite(distance).sum()))
+        if k == 0:
+            return []
+        nearest = np.argpartition(distance, k - 1)[:k]
+        nearest = nearest[np.argsort(distance[nearest])]
+        return [{"day": days[i].isoformat(), "distance": round(float(distance[i]), 4)} for i in nearest]
+
+day_profile_index = DayProfileIndex(DAY_INDEX_REFRESH_SECONDS, DAY_INDEX_RELOAD_DAYS)
+
+@app.post("/api/lmp/similar")
+async def get_similar_days(query: LmpSimilarQuery):
+    """Top-k historical days whose 24-hour zone price profile is closest to target_day."""
+    if query.metric not in DAY_INDEX_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(DAY_INDEX_METRICS)}.")
+    if not 1 <= query.k <= 365:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 365.")
+    try:
+        target_day = datetime.strptime(query.target_day, '%Y-%m-%d').date()
+        index = await day_profile_index.get()
+        results = await asyncio.to_thread(
+            index.search, target_day, query.metric, query.k, query.zones,
+            query.days_of_week or list(ALL_DAYS_OF_WEEK), max(query.exclude_days, 0),
+        )
+        return {"target_day": query.target_day, "metric": query.metric, "results": results}
+
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Please use YYYY-MM-DD.")
+    except Exception as e:
+        print(f"An unexpected server error occurred while searching similar days: {e}")
+        raise HTTPException(status_code=500, detail="An internal server error occurred processing your request.")
+
+# --- Constraint Facility List ---
+
+CONSTRAINT_LIST_TTL = int(os.getenv("CONSTRAINT_LIST_TTL", 300))
+# sort -> (key, reverse); most binding hours and most recently seen first, never-seen last
+CONSTRAINT_LIST_SORTS = {
+    "name": (lambda f: f["name"].lower(), False),
+    "binding_hours": (lambda f: -f["binding_hours"], False),
+    "last_seen": (lambda f: (f["last_seen"] is not None, f["last_seen"] or ""), True),
+}
+
+class FacilityListCache:
+    """Small in-memory copy of pjm_constraint_facilities, reloaded after CONSTRAINT_LIST_TTL seconds or on invalidation."""
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.facilities = []
+        self.loaded_at = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    async def get(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl:
+            async with self._lock:
+                if self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl:
+                    rows = await fetch_rows("""
+                        SELECT monitored_facility, first_seen, last_seen, binding_hours
+                        FROM electric_data.pjm_constraint_facilities
+                        ORDER BY monitored_facility ASC
+                    """, {})
+                    self.facilities = [
+                        {
+                            "name": name,
+                            "first_seen": first_seen.isoformat() if first_seen else None,
+                            "last_seen": last_seen.isoformat() if last_seen else None,
+                            "binding_hours": int(binding_hours or 0),
+                        }
+                        for name, first_seen, last_seen, binding_hours in rows
+                    ]
+                    self.loaded_at = time.monotonic()
+        return self.facilities
+
+facility_list_cache = FacilityListCache(CONSTRAINT_LIST_TTL)
+
 @app.get("/api/constraints/list")
-def get_unique_constraints(db: Session = Depends(get_db)):
+async def get_unique_constraints(q: Optional[str] = None, offset: int = 0, limit: Optional[int] = None, sort: str = "name"):
+    if sort not in CONSTRAINT_LIST_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'. Use one of: {', '.join(CONSTRAINT_LIST_SORTS)}.")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail="offset and limit must be non-negative.")
     try:
-        # Query for distinct monitored facilities aka constraints
-        query = text("""
-            SELECT DISTINCT monitored_facility 
-            FROM electric_data.pjm_binding_constraints
-            WHERE monitored_facility IS NOT NULL
-            ORDER BY monitored_facility ASC
-        """)
-        
-        result = db.execute(query)
-        constraints = [row[0] for row in result.fetchall()]
-        return {"constraints": constraints}
+        # Distinct monitored facilities aka constraints, maintained by the constraint ingest
+        facilities = await facility_list_cache.get()
+
+        if q:
+            prefix = q.lower()
+            facilities = [f for f in facilities if f["name"].lower().startswith(prefix)]
+        if sort != "name":
+            key, reverse = CONSTRAINT_LIST_SORTS[sort]
+            facilities = sorted(facilities, key=key, reverse=reverse)
+
+        total = len(facilities)
+        page = facilities[offset:] if limit is None else facilities[offset:offset + limit]
+        return {
+            "constraints": [f["name"] for f in page],
+            "facilities": page,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+        }
         
     except Exception as e:
         print(f"An unexpected server error occurred while fetching constraint list: {e}")
         raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+CACHE_INVALIDATE_TOKEN = os.getenv("CACHE_INVALIDATE_TOKEN")
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+def authorize_admin_request(request: Request):
+    """
+    Guards the cache and pool endpoints: needs the X-Cache-Token header when
+    CACHE_INVALIDATE_TOKEN is set, else a loopback caller (CORS is open to any origin).
+    """
+    if CACHE_INVALIDATE_TOKEN:
+        if not hmac.compare_digest(request.headers.get("X-Cache-Token", ""), CACHE_INVALIDATE_TOKEN):
+            raise HTTPException(status_code=403, detail="Invalid cache token.")
+    elif request.client is None or request.client.host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="Only accepted from localhost unless CACHE_INVALIDATE_TOKEN is set.")
+
+@app.get("/api/cache/stats")
+async def get_cache_stats(request: Request):
+    authorize_admin_request(request)
+    return result_cache.stats()
+
+class CacheInvalidateQuery(BaseModel):
+    start_day: Optional[str] = None
+    end_day: Optional[str] = None
+    all: bool = False
+
+@app.post("/api/cache/invalidate")
+async def invalidate_cache(request: Request, query: Optional[CacheInvalidateQuery] = None):
+    """
+    Called by the hydrate scripts. With no body (the watchdog's new hours) only entries
+    touching unverified data are dropped; with start_day/end_day (backfills, gap
+    repairs, re-fetched history) stable entries overlapping those days go too, and
+    all=true drops everything.
+    """
+    authorize_admin_request(request)
+    since = None
+    if query is not None and (query.all or query.start_day):
+        try:
+            start_dt = None if query.all else datetime.strptime(query.start_day, '%Y-%m-%d')
+            end_dt = None if query.all else datetime.strptime(query.end_day or query.start_day, '%Y-%m-%d') + timedelta(days=1)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Please use YYYY-MM-DD.")
+        dropped = await asyncio.to_thread(result_cache.invalidate_range, start_dt, end_dt)
+        since = start_dt or datetime.min
+    else:
+        dropped = result_cache.invalidate_volatile()
+    range_verification.invalidate()
+    facility_list_cache.invalidate()
+    day_profile_index.invalidate(since)
+    return {"invalidated": dropped}
+
+@app.get("/api/pool/stats")
+async def get_pool_stats(request: Request):
+    authorize_admin_request(request)
+    pool = engine.pool
+    return {
+        "config": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pre_ping": DB_POOL_PRE_PING,
+        },
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "wait": pool_wait_stats.summary(),
+    }
@@ -0,0 +1,96 @@
+# src/bench/bench_bulk_load.py
+#
+# Rows/sec for the three ways the hydrate scripts can write 5-minute LMPs: the
+# row-batch executemany upsert, and db_bulk's staged merge via multi-row INSERTs
+# ("values") or LOAD DATA LOCAL INFILE ("infile"). Each method loads N synthetic
+# rows into an empty scratch copy of pjm_rt_unverified_fivemin_lmps (insert), then
+# the same keys again with new prices (update).
+#
+# Point the DB_* keys at a local MySQL (never production), with local_infile=ON on
+# the server for the infile method:
+#
+#   HYDRATE_DB_LOCAL_INFILE=true python bench_bulk_load.py --rows 500000
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hydrate"))
+from db_pool import connect
+from db_bulk import bulk_upsert
+from pjm_api import PNODE_IDS
+
+SCRATCH_TABLE = "bench_fivemin_lmps"
+COLUMNS = ("datetime_beginning_ept", "pnode_id", "pnode_name", "total_lmp_rt", "congestion_price_rt", "marginal_loss_price_rt")
+
+def synthetic_rows(n_rows, seed):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(n_rows):
+        pnode_id = PNODE_IDS[i % len(PNODE_IDS)]
+        ts = start + timedelta(minutes=5 * (i // len(PNODE_IDS)))
+        price = round(30 + 20 * rng.random(), 5)
+        rows.append((ts, pnode_id, f"PNODE {pnode_id}", price, round(rng.uniform(-5, 5), 5), round(rng.uniform(-1, 1), 5)))
+    return rows
+
+def executemany_upsert(conn, rows):
+    sql = f"""
+        INSERT INTO {SCRATCH_TABLE} ({', '.join(COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            total_lmp_rt = VALUES(total_lmp_rt),
+            congestion_price_rt = VALUES(congestion_price_rt),
+            marginal_loss_price_rt = VALUES(marginal_loss_price_rt)
+    """
+    with conn.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+METHODS = {
+    "executemany": executemany_upsert,
+    "values": lambda conn, rows: bulk_upsert(conn, SCRATCH_TABLE, COLUMNS, rows, update_columns=COLUMNS[3:], method="values"),
+    "infile": lambda conn, rows: bulk_upsert(conn, SCRATCH_TABLE, COLUMNS, rows, update_columns=COLUMNS[3:], method="infile"),
+}
+
+def reset_scratch_table(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        cursor.execute(f"CREATE TABLE {SCRATCH_TABLE} LIKE pjm_rt_unverified_fivemin_lmps")
+    conn.commit()
+
+def timed(load, conn, rows, batch_rows):
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_rows):
+        load(conn, rows[i:i + batch_rows])
+        conn.commit()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark executemany vs bulk-load upserts.")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-rows", type=int, default=50000, help="Rows per call, like one PJM page")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    args = parser.parse_args()
+
+    inserts = synthetic_rows(args.rows, seed=1)
+    updates = synthetic_rows(args.rows, seed=2)
+    conn = connect()
+    try:
+        print(f"--- {args.rows} rows in batches of {args.batch_rows} ---")
+        print(f"   {'method':<14}{'insert rows/s':>16}{'update rows/s':>16}")
+        for name in args.methods:
+            reset_scratch_table(conn)
+            try:
+                insert_s = timed(METHODS[name], conn, inserts, args.batch_rows)
+                update_s = timed(METHODS[name], conn, updates, args.batch_rows)
+            except Exception as e:
+                conn.rollback()
+                print(f"   {name:<14}  failed: {e}")
+                continue
+            print(f"   {name:<14}{args.rows / insert_s:>16,.0f}{args.rows / update_s:>16,.0f}")
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        conn.close()
@@ -0,0 +1,174 @@
+# src/bench/bench_calendar_filters.py
+#
+# Compares the function-wrapped hour/day-of-week filters against the stored
+# calendar columns on a year of synthetic zone-hour and constraint data.
+# Runs against a LOCAL MySQL only; it creates and drops its own schema.
+#
+#   BENCH_DB_HOST=127.0.0.1 BENCH_DB_USER=root BENCH_DB_PASSWORD=... python bench_calendar_filters.py
+
+import os
+import random
+import statistics
+import time
+import pymysql
+from datetime import datetime, timedelta
+
+BENCH_DB_CONFIG = {
+    "host": os.getenv("BENCH_DB_HOST", "127.0.0.1"),
+    "user": os.getenv("BENCH_DB_USER", "root"),
+    "password": os.getenv("BENCH_DB_PASSWORD", ""),
+    "port": int(os.getenv("BENCH_DB_PORT", 3306)),
+}
+BENCH_SCHEMA = "lmp_bench"
+ZONES = [f"Z{i:02d}" for i in range(30)]
+FACILITIES = [f"FACILITY {i:03d}" for i in range(40)]
+YEAR_START = datetime(2024, 1, 1)
+RUNS = 5
+
+CALENDAR_COLUMNS = """
+    hour_of_day TINYINT AS (HOUR(datetime_beginning_ept)) STORED,
+    dow TINYINT AS (DAYOFWEEK(datetime_beginning_ept)) STORED,
+    hour_bucket DATETIME AS (CAST(DATE_FORMAT(datetime_beginning_ept, '%Y-%m-%d %H:00:00') AS DATETIME)) STORED,
+    INDEX ix_calendar (dow, hour_of_day, datetime_beginning_ept),
+"""
+
+# "Like days" filter: weekday afternoons in the summer
+FILTER = {
+    "start_dt": datetime(2024, 6, 1),
+    "end_dt": datetime(2024, 9, 1),
+    "start_hour": 15,
+    "end_hour": 20,
+    "days_of_week": (2, 3, 4, 5, 6),
+}
+
+OLD_LMP_SQL = """
+    SELECT Transact_Z, datetime_beginning_ept, lmp_da, lmp_rt, lmp_net
+    FROM zone_hourly
+    WHERE datetime_beginning_ept >= %(start_dt)s AND datetime_beginning_ept < %(end_dt)s
+      AND EXTRACT(HOUR FROM datetime_beginning_ept) >= %(start_hour)s
+      AND EXTRACT(HOUR FROM datetime_beginning_ept) < %(end_hour)s
+      AND DAYOFWEEK(datetime_beginning_ept) IN %(days_of_week)s
+    ORDER BY Transact_Z, datetime_beginning_ept
+"""
+
+NEW_LMP_SQL = """
+    SELECT Transact_Z, datetime_beginning_ept, lmp_da, lmp_rt, lmp_net
+    FROM zone_hourly
+    WHERE dow IN %(days_of_week)s
+      AND hour_of_day IN %(hours)s
+      AND datetime_beginning_ept >= %(start_dt)s AND datetime_beginning_ept < %(end_dt)s
+    ORDER BY Transact_Z, datetime_beginning_ept
+"""
+
+OLD_CONSTRAINT_SQL = """
+    SELECT DATE_FORMAT(datetime_beginning_ept, '%%Y-%%m-%%d %%H:00:00') AS hour_beginning,
+           monitored_facility, ROUND(SUM(shadow_price) / 12, 2) AS shadow_price
+    FROM binding_constraints
+    WHERE datetime_beginning_ept >= %(start_dt)s AND datetime_beginning_ept < %(end_dt)s
+      AND EXTRACT(HOUR FROM datetime_beginning_ept) >= %(start_hour)s
+      AND EXTRACT(HOUR FROM datetime_beginning_ept) < %(end_hour)s
+      AND DAYOFWEEK(datetime_beginning_ept) IN %(days_of_week)s
+    GROUP BY hour_beginning, monitored_facility
+    ORDER BY hour_beginning, monitored_facility
+"""
+
+NEW_CONSTRAINT_SQL = """
+    SELECT hour_bucket AS hour_beginning,
+           monitored_facility, ROUND(SUM(shadow_price) / 12, 2) AS shadow_price
+    FROM binding_constraints
+    WHERE dow IN %(days_of_week)s
+      AND hour_of_day IN %(hours)s
+      AND datetime_beginning_ept >= %(start_dt)s AND datetime_beginning_ept < %(end_dt)s
+    GROUP BY hour_beginning, monitored_facility
+    ORDER BY hour_beginning, monitored_facility
+"""
+
+def create_schema(cursor):
+    cursor.execute(f"DROP DATABASE IF EXISTS {BENCH_SCHEMA}")
+    cursor.execute(f"CREATE DATABASE {BENCH_SCHEMA}")
+    cursor.execute(f"USE {BENCH_SCHEMA}")
+    cursor.execute(f"""
+        CREATE TABLE zone_hourly (
+            datetime_beginning_ept DATETIME NOT NULL,
+            Transact_Z VARCHAR(64) NOT NULL,
+            lmp_da DECIMAL(12, 5), lmp_rt DECIMAL(12, 5), lmp_net DECIMAL(12, 5),
+            {CALENDAR_COLUMNS}
+            PRIMARY KEY (datetime_beginning_ept, Transact_Z)
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE binding_constraints (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            datetime_beginning_ept DATETIME NOT NULL,
+            monitored_facility VARCHAR(255),
+            shadow_price DECIMAL(12, 5),
+            {CALENDAR_COLUMNS}
+            INDEX ix_datetime (datetime_beginning_ept),
+            INDEX ix_hour_bucket (hour_bucket, monitored_facility)
+        )
+    """)
+
+def load_synthetic_year(conn, cursor):
+    print("   ⬇️ Loading one year of synthetic zone-hour data...")
+    rows = []
+    for h in range(24 * 366):
+        ts = YEAR_START + timedelta(hours=h)
+        for zone in ZONES:
+            da = random.uniform(15, 90)
+            rt = da + random.gauss(0, 8)
+            rows.append((ts, zone, da, rt, rt - da))
+        if len(rows) >= 20000:
+            cursor.executemany("INSERT INTO zone_hourly (datetime_beginning_ept, Transact_Z, lmp_da, lmp_rt, lmp_net) VALUES (%s, %s, %s, %s, %s)", rows)
+            rows = []
+    if rows:
+        cursor.executemany("INSERT INTO zone_hourly (datetime_beginning_ept, Transact_Z, lmp_da, lmp_rt, lmp_net) VALUES (%s, %s, %s, %s, %s)", rows)
+
+    print("   ⬇️ Loading one year of synthetic 5-minute constraint data...")
+    rows = []
+    for interval in range(24 * 366 * 12):
+        ts = YEAR_START + timedelta(minutes=5 * interval)
+        for facility in random.sample(FACILITIES, 3):
+            rows.append((ts, facility, random.uniform(-200, 0)))
+        if len(rows) >= 20000:
+            cursor.executemany("INSERT INTO binding_constraints (datetime_beginning_ept, monitored_facility, shadow_price) VALUES (%s, %s, %s)", rows)
+            rows = []
+    if rows:
+        cursor.executemany("INSERT INTO binding_constraints (datetime_beginning_ept, monitored_facility, shadow_price) VALUES (%s, %s, %s)", rows)
+    conn.commit()
+    cursor.execute("ANALYZE TABLE zone_hourly, binding_constraints")
+    cursor.fetchall()
+
+def time_query(cursor, sql, params):
+    timings = []
+    row_count = 0
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        row_count = len(cursor.fetchall())
+        timings.append((time.perf_counter() - start) * 1000)
+    cursor.execute("EXPLAIN " + sql, params)
+    plan = cursor.fetchone()
+    return statistics.median(timings), row_count, plan
+
+def report(label, cursor, old_sql, new_sql, params):
+    old_ms, old_rows, old_plan = time_query(cursor, old_sql, params)
+    new_ms, new_rows, new_plan = time_query(cursor, new_sql, params)
+    print(f"\n--- {label} ---")
+    print(f"   old: {old_ms:8.1f} ms  rows={old_rows:<7} access={old_plan[4]} key={old_plan[6]}")
+    print(f"   new: {new_ms:8.1f} ms  rows={new_rows:<7} access={new_plan[4]} key={new_plan[6]}")
+    print(f"   speedup: {old_ms / new_ms:.1f}x")
+
+if __name__ == "__main__":
+    conn = pymysql.connect(**BENCH_DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        create_schema(cursor)
+        load_synthetic_year(conn, cursor)
+
+        params = dict(FILTER, hours=tuple(range(FILTER["start_hour"], FILTER["end_hour"])))
+        report("Zone LMP range query", cursor, OLD_LMP_SQL, NEW_LMP_SQL, params)
+        report("Constraint range query", cursor, OLD_CONSTRAINT_SQL, NEW_CONSTRAINT_SQL, params)
+
+        cursor.execute(f"DROP DATABASE {BENCH_SCHEMA}")
+    finally:
+        conn.close()
@@ -0,0 +1,52 @@
+# src/bench/bench_pnode_filter.py
+#
+# Compares the two ways of pulling only the tracked pnodes from a PJM feed:
+# one unfiltered query filtered locally ("all") versus one pnode_id-filtered
+# query per node ("per_node"). Reports requests, bytes downloaded, rows kept and
+# wall time for each, next to the cost model's estimates and its pick.
+#
+# Run it against the local stub (or the real API by leaving PJM_API_BASE_URL unset):
+#
+#   python pjm_stub_server.py --port 8765 --rate-per-min 600 --latency 0.2
+#   PJM_API_BASE_URL=http://127.0.0.1:8765/api/v1 PJM_RATE_PER_MIN=600 python bench_pnode_filter.py --hours 1 --feed rt_unverified_fivemin_lmps
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hydrate"))
+from pjm_api import PJMClient, PNODE_IDS
+
+def run_strategy(strategy, feed, params, n_hours, rows_per_hour):
+    client = PJMClient()
+    start = time.perf_counter()
+    rows = sum(len(page) for page in client.iter_pnode_pages(feed, params, PNODE_IDS, n_hours, rows_per_hour, strategy=strategy))
+    return {
+        "seconds": time.perf_counter() - start,
+        "requests": client.requests_made,
+        "bytes": client.bytes_downloaded,
+        "rows": rows,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pnode filtering strategies.")
+    parser.add_argument("--feed", default="rt_unverified_fivemin_lmps")
+    parser.add_argument("--hours", type=float, default=1)
+    parser.add_argument("--end", default=None, help="Window end, YYYY-MM-DD HH:MM (default: top of the current hour)")
+    args = parser.parse_args()
+
+    end_dt = datetime.fromisoformat(args.end) if args.end else datetime.now().replace(minute=0, second=0, microsecond=0)
+    start_dt = end_dt - timedelta(hours=args.hours)
+    rows_per_hour = 12 if "fivemin" in args.feed else 1
+    params = {'datetime_beginning_ept': f"{start_dt.strftime('%Y-%m-%d %H:%M:%S')} to {end_dt.strftime('%Y-%m-%d %H:%M:%S')}"}
+
+    pick, estimates = PJMClient().plan_pnode_fetch(len(PNODE_IDS), args.hours, rows_per_hour)
+    print(f"--- {args.feed}: {args.hours:g}h window, {len(PNODE_IDS)} pnodes ---")
+    print(f"   cost model picks: {pick}")
+    print(f"   {'strategy':<10}{'est s':>9}{'wall s':>9}{'requests':>10}{'MB':>9}{'rows':>9}")
+    for strategy in ("all", "per_node"):
+        result = run_strategy(strategy, args.feed, params, args.hours, rows_per_hour)
+        print(f"   {strategy:<10}{estimates[strategy]:>9.1f}{result['seconds']:>9.1f}{result['requests']:>10}"
+              f"{result['bytes'] / 1e6:>9.2f}{result['rows']:>9}")
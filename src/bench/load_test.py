@@ -0,0 +1,77 @@
+# src/bench/load_test.py
+#
+# Concurrent-user load test for the FastAPI backend. Each simulated user loops
+# over a mix of /api/zones, /api/constraints/list and /api/lmp/range requests
+# for the given duration; latency percentiles are reported per endpoint.
+#
+# To compare before/after, run the old and new backends on different ports and
+# pass both URLs:
+#
+#   python load_test.py http://127.0.0.1:8000 http://127.0.0.1:8001 --users 50 --seconds 60
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import httpx
+
+RANGE_QUERIES = [
+    {"start_day": "2025-06-01", "end_day": "2025-08-31", "days_of_week": [2, 3, 4, 5, 6], "start_hour": 15, "end_hour": 20},
+    {"start_day": "2025-01-01", "end_day": "2025-01-31", "start_hour": 0, "end_hour": 24},
+    {"start_day": "2025-11-01", "end_day": "2025-11-07", "start_hour": 7, "end_hour": 22},
+]
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def simulated_user(client, deadline, latencies, errors):
+    while time.monotonic() < deadline:
+        roll = random.random()
+        if roll < 0.3:
+            name, request = "/api/zones", client.get("/api/zones")
+        elif roll < 0.4:
+            name, request = "/api/constraints/list", client.get("/api/constraints/list")
+        else:
+            body = dict(random.choice(RANGE_QUERIES), format="columnar")
+            name, request = "/api/lmp/range", client.post("/api/lmp/range", json=body)
+
+        start = time.perf_counter()
+        try:
+            response = await request
+            response.raise_for_status()
+            latencies.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+        except httpx.HTTPError:
+            errors[name] = errors.get(name, 0) + 1
+
+async def run_load(base_url, users, seconds):
+    latencies, errors = {}, {}
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        deadline = time.monotonic() + seconds
+        await asyncio.gather(*(simulated_user(client, deadline, latencies, errors) for _ in range(users)))
+    return latencies, errors
+
+def print_report(base_url, latencies, errors, seconds):
+    print(f"\n--- {base_url} ---")
+    print(f"   {'endpoint':<24}{'reqs':>7}{'err':>6}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name in sorted(set(latencies) | set(errors)):
+        samples = latencies.get(name, [])
+        print(f"   {name:<24}{len(samples):>7}{errors.get(name, 0):>6}{len(samples) / seconds:>8.1f}"
+              f"{statistics.median(samples) if samples else float('nan'):>10.1f}"
+              f"{percentile(samples, 95):>10.1f}{percentile(samples, 99):>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the LMP backend with concurrent users.")
+    parser.add_argument("base_urls", nargs="+", help="One or more backend base URLs (e.g. before and after).")
+    parser.add_argument("--users", type=int, default=25)
+    parser.add_argument("--seconds", type=int, default=30)
+    args = parser.parse_args()
+
+    for url in args.base_urls:
+        latencies, errors = asyncio.run(run_load(url, args.users, args.seconds))
+        print_report(url, latencies, errors, args.seconds)
@@ -0,0 +1,125 @@
+# src/bench/pjm_stub_server.py
+#
+# Local stand-in for PJM Data Miner 2. Serves synthetic hourly (or 5-minute) items,
+# enforces a requests-per-minute quota (429 + Retry-After beyond it), injects random
+# 503s, and adds artificial latency, so the hydrate fetch scheduler can be timed and
+# checked without touching the real API:
+#
+#   python pjm_stub_server.py --port 8765 --rate-per-min 6 --error-rate 0.05
+#   PJM_API_BASE_URL=http://127.0.0.1:8765/api/v1 python ../hydrate/pjm_query_da_lmp.py 2025-01-01 2025-01-31
+
+import os
+import sys
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hydrate"))
+from pjm_api import PNODE_IDS
+
+def parse_range(value):
+    """'YYYY-MM-DD[ HH:MM[:SS]] to YYYY-MM-DD[ ...]' -> (start, end) datetimes."""
+    parts = [p.strip().replace("T", " ") for p in value.split(" to ")]
+    start = datetime.fromisoformat(parts[0])
+    end = datetime.fromisoformat(parts[1]) if len(parts) > 1 else start
+    if len(parts[-1]) == 10:  # whole end day
+        end += timedelta(days=1)
+    return start, end
+
+def synthetic_item(ts, pnode_id):
+    price = round(30 + 20 * random.random(), 2)
+    return {
+        "datetime_beginning_ept": ts.isoformat(),
+        "pnode_id": pnode_id,
+        "pnode_name": f"PNODE {pnode_id}",
+        "type": "ZONE",
+        "system_energy_price_da": price,
+        "total_lmp_da": price,
+        "congestion_price_da": 0.0,
+        "marginal_loss_price_da": 0.0,
+        "total_lmp_rt": price,
+        "congestion_price_rt": 0.0,
+        "marginal_loss_price_rt": 0.0,
+    }
+
+def synthetic_items(feed, query, all_pnodes):
+    """
+    One row per interval per pnode (5-minute feeds when the feed name says so), ordered
+    by time then pnode. Without a pnode_id filter every stub pnode is returned, like the
+    real unfiltered feeds. Only the requested page is materialized.
+    """
+    start, end = parse_range(query.get("datetime_beginning_ept", ["2025-01-01"])[0])
+    step = timedelta(minutes=5) if "fivemin" in feed else timedelta(hours=1)
+    pnodes = [int(query["pnode_id"][0])] if "pnode_id" in query else all_pnodes
+    n_intervals = int((end - start) / step)
+    total = n_intervals * len(pnodes)
+
+    start_row = int(query.get("startRow", ["1"])[0])
+    row_count = int(query.get("rowCount", ["50000"])[0])
+    rows = range(start_row - 1, min(total, start_row - 1 + row_count))
+    return [synthetic_item(start + step * (i // len(pnodes)), pnodes[i % len(pnodes)]) for i in rows], total
+
+class StubHandler(BaseHTTPRequestHandler):
+    quota = 6
+    error_rate = 0.0
+    latency = 0.5
+    all_pnodes = list(range(1, 1001))
+    requests_seen = deque()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        now = time.monotonic()
+        with self.lock:
+            while self.requests_seen and now - self.requests_seen[0] > 60:
+                self.requests_seen.popleft()
+            over_quota = len(self.requests_seen) >= self.quota
+            if not over_quota:
+                self.requests_seen.append(now)
+            retry_after = 60 - (now - self.requests_seen[0]) if over_quota else 0
+
+        if over_quota:
+            return self.reply(429, {"error": "rate limit"}, {"Retry-After": f"{retry_after:.0f}"})
+        if random.random() < self.error_rate:
+            return self.reply(503, {"error": "injected failure"})
+
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        items, total = synthetic_items(url.path.rsplit("/", 1)[-1], parse_qs(url.query), self.all_pnodes)
+        self.reply(200, {"items": items, "totalRows": total})
+
+    def reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        print(f"   {self.command} {self.path[:100]} -> {args[1] if len(args) > 1 else ''}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local PJM Data Miner 2 stub.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-per-min", type=int, default=6)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--pnodes", type=int, default=12000, help="pnodes in an unfiltered response (the tracked ones included)")
+    args = parser.parse_args()
+
+    StubHandler.quota = args.rate_per_min
+    StubHandler.error_rate = args.error_rate
+    StubHandler.latency = args.latency
+    tracked = set(PNODE_IDS)
+    filler = [pnode_id for pnode_id in range(1, args.pnodes + 1) if pnode_id not in tracked]
+    StubHandler.all_pnodes = PNODE_IDS + filler[:max(0, args.pnodes - len(PNODE_IDS))]
+    print(f"--- PJM stub on http://127.0.0.1:{args.port}/api/v1 ({args.rate_per_min}/min, {args.error_rate:.0%} errors) ---")
+    ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler).serve_forever()
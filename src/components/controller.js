@@ -1,7 +1,7 @@
 import maplibregl from "npm:maplibre-gl";
 import { API_BASE_URL, COLOR_SCALE, NET_COLOR_SCALE } from "./config.js";
-import { transformApiData, getColorForLmp } from "./utils.js";
-import { calculateGlobalStats, calculateZoneAverages } from "./math.js";
+import { transformApiData, transformColumnarData, getColorForLmp } from "./utils.js";
+import { calculateGlobalStats, calculateZoneAverages, summaryToZoneAverages, summaryToConstraintStats } from "./math.js";
 import { renderConstraintList, displayCurrentFilter, setConstraintModeUI, createZonePopupHTML, CONGESTION_POPUP_HTML, } from "./ui.js";
 
 export class MapController {
@@ -12,6 +12,8 @@ export class MapController {
         this.constraintsData = [];
         this.averageDataCache = {};
         this.globalConstraintCache = [];
+        this.congestionMatrix = null;
+        this.currentQuery = null;
         
         // State
         this.currentIndex = 0;
@@ -35,6 +37,12 @@ export class MapController {
         if (this.activePriceType === 'congestion') {
             if (!this.selectedZoneName || !dataMap[this.selectedZoneName]) return null;
             if (zoneName === this.selectedZoneName) return 0;
+
+            // Averaged view: read the precomputed load x remote matrix row
+            const matrix = this.congestionMatrix;
+            if (this.isAverageMode && matrix && zoneName in matrix.index && this.selectedZoneName in matrix.index) {
+                return matrix.deltas[matrix.index[this.selectedZoneName]][matrix.index[zoneName]];
+            }
             
             const loadZonePrice = Number(dataMap[this.selectedZoneName].rt || 0);
             const remoteZonePrice = Number(dataMap[zoneName].rt || 0);
@@ -68,24 +76,44 @@ export class MapController {
                 days_of_week: daysBooleans.map((isActive, index) => isActive ? index + 1 : null).filter(val => val !== null),
                 start_hour: parseInt(filter.startTime) || 0,
                 end_hour: parseInt(filter.endTime) || 24,
-                monitored_facility: filter.selectedConstraint || null
+                monitored_facility: filter.selectedConstraint || null,
+                format: 'columnar'
             };
 
-            const response = await fetch(`${API_BASE_URL}/api/lmp/range`, { 
+            const requestOptions = (body) => ({
                 method: 'POST', 
                 headers: { 
                     'Content-Type': 'application/json',
                     'ngrok-skip-browser-warning': 'true' 
                 }, 
-                body: JSON.stringify(query),
+                body: JSON.stringify(body),
                 signal: this.abortController.signal 
             });
+
+            // Averages and constraint totals come pre-aggregated from the server;
+            // the hourly series is only needed for playback and plots.
+            const summaryPromise = fetch(`${API_BASE_URL}/api/lmp/summary`, requestOptions({ ...query, format: 'json' }))
+                .then(res => res.ok ? res.json() : null)
+                .catch(() => null);
+
+            // The congestion matrix is only fetched while that view is showing
+            this.currentQuery = query;
+            this.congestionMatrix = null;
+            if (this.activePriceType === 'congestion') this.loadCongestionMatrix();
+
+            const response = await fetch(`${API_BASE_URL}/api/lmp/range`, requestOptions(query));
             
             if (!response.ok) throw new Error(`Server error: ${response.statusText}`);
             
             const rawData = await response.json();
-            this.constraintsData = rawData.constraints || [];
-            this.timeSeriesData = transformApiData(rawData.zones || rawData);
+            if (rawData.format === 'columnar') {
+                const decoded = transformColumnarData(rawData);
+                this.constraintsData = decoded.constraints;
+                this.timeSeriesData = decoded.timeSeriesData;
+            } else {
+                this.constraintsData = rawData.constraints || [];
+                this.timeSeriesData = transformApiData(rawData.zones || rawData);
+            }
 
             // Update plot manager with new data
             if (window.zonePlotManager && this.timeSeriesData) {
@@ -99,8 +127,14 @@ export class MapController {
             }
 
             displayCurrentFilter(filter, this.timeSeriesData.length);
-            this.globalConstraintCache = calculateGlobalStats(this.constraintsData, this.timeSeriesData.length);
-            this.averageDataCache = calculateZoneAverages(this.timeSeriesData);
+            const summary = await summaryPromise;
+            if (summary && summary.zones) {
+                this.globalConstraintCache = summaryToConstraintStats(summary);
+                this.averageDataCache = summaryToZoneAverages(summary);
+            } else {
+                this.globalConstraintCache = calculateGlobalStats(this.constraintsData, this.timeSeriesData.length);
+                this.averageDataCache = calculateZoneAverages(this.timeSeriesData);
+            }
             
             this.ui.slider.max = this.timeSeriesData.length - 1;
             this.ui.slider.disabled = false;
@@ -115,6 +149,31 @@ export class MapController {
         }
     }
 
+    // Mean zone x zone RT deltas for the current query, so switching the load zone needs no recomputation
+    loadCongestionMatrix() {
+        if (!this.currentQuery || !this.abortController) return;
+        const signal = this.abortController.signal;
+        fetch(`${API_BASE_URL}/api/lmp/congestion`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'ngrok-skip-browser-warning': 'true'
+            },
+            body: JSON.stringify({ ...this.currentQuery, format: 'json', aggregate: 'mean' }),
+            signal
+        })
+            .then(res => res.ok ? res.json() : null)
+            .then(matrix => {
+                if (!matrix || signal.aborted) return;
+                this.congestionMatrix = {
+                    index: Object.fromEntries(matrix.zones.map((zone, i) => [zone, i])),
+                    deltas: matrix.deltas
+                };
+                if (this.isAverageMode && this.activePriceType === 'congestion') this.renderCurrentView();
+            })
+            .catch(() => {});
+    }
+
     renderCurrentView() {
         if (this.isAverageMode) { 
             this.renderAverageView(); 
@@ -333,6 +392,7 @@ export class MapController {
 
     setPriceType(type) { 
         this.activePriceType = type; 
+        if (type === 'congestion' && !this.congestionMatrix) this.loadCongestionMatrix();
         this.updateZoneBorders(); 
         this.renderCurrentView(); 
         
@@ -48,3 +48,23 @@ export function calculateZoneAverages(timeSeriesData) {
     
     return averages;
 }
+
+// Server-side equivalents of the two helpers above, from /api/lmp/summary
+export function summaryToZoneAverages(summary) {
+    const averages = {};
+    Object.entries(summary?.zones || {}).forEach(([zone, stats]) => {
+        averages[zone] = {
+            da: stats.da.mean,
+            rt: stats.rt.mean,
+            net: stats.net.mean,
+            stats: stats
+        };
+    });
+    return averages;
+}
+
+export function summaryToConstraintStats(summary) {
+    return (summary?.constraints || [])
+        .map(c => ({ name: c.name, price: c.price }))
+        .sort((a, b) => a.price - b.price);
+}
@@ -41,3 +41,42 @@ export function transformApiData(apiData) {
     
     return Object.keys(dataByTimestamp).sort().map(ts => dataByTimestamp[ts]);
 }
+
+function decodeTypedArray(base64, ArrayType) {
+    const bytes = Uint8Array.from(atob(base64 || ''), c => c.charCodeAt(0));
+    return new ArrayType(bytes.buffer);
+}
+
+// Decodes the `format: "columnar"` range response (dense zone-major float32 grids)
+// into the same shape transformApiData produces.
+export function transformColumnarData(payload) {
+    const zones = payload.zones || [];
+    const timestamps = payload.timestamps || [];
+    const nTimes = timestamps.length;
+    const da = decodeTypedArray(payload.da, Float32Array);
+    const rt = decodeTypedArray(payload.rt, Float32Array);
+    const net = decodeTypedArray(payload.net, Float32Array);
+    const toValue = (v) => Number.isNaN(v) ? null : v;
+
+    const timeSeriesData = timestamps.map((datetime, t) => {
+        const readings = {};
+        zones.forEach((zoneName, z) => {
+            const i = z * nTimes + t;
+            if (Number.isNaN(da[i]) && Number.isNaN(rt[i]) && Number.isNaN(net[i])) return;
+            readings[zoneName] = { da: toValue(da[i]), rt: toValue(rt[i]), net: toValue(net[i]), congestion: null };
+        });
+        return { datetime, readings };
+    });
+
+    const c = payload.constraints || {};
+    const nameIdx = decodeTypedArray(c.name_idx, Uint16Array);
+    const timeIdx = decodeTypedArray(c.time_idx, Uint32Array);
+    const shadowPrice = decodeTypedArray(c.shadow_price, Float32Array);
+    const constraints = Array.from(nameIdx, (n, i) => ({
+        name: c.names[n],
+        timestamp: c.timestamps[timeIdx[i]],
+        shadow_price: toValue(shadowPrice[i])
+    }));
+
+    return { timeSeriesData, constraints };
+}
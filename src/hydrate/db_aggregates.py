@@ -0,0 +1,139 @@
+# src/hydrate/db_aggregates.py
+
+import os
+import sys
+import requests
+from dotenv import load_dotenv
+from datetime import date, datetime, timedelta
+
+from db_pool import connect
+
+load_dotenv()
+
+BACKEND_URL = os.getenv("BACKEND_URL")
+CACHE_INVALIDATE_TOKEN = os.getenv("CACHE_INVALIDATE_TOKEN")
+ZONE_HOURLY_TABLE = "pjm_zone_hrl_lmps"
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+# resolution -> (table, SQL period of datetime_beginning_ept, period floor, next period start)
+ZONE_ROLLUPS = {
+    "day": ("pjm_zone_daily_lmps", "DATE(datetime_beginning_ept)",
+            lambda d: d, lambda d: d + timedelta(days=1)),
+    "week": ("pjm_zone_weekly_lmps", "DATE_SUB(DATE(datetime_beginning_ept), INTERVAL WEEKDAY(datetime_beginning_ept) DAY)",
+             lambda d: d - timedelta(days=d.weekday()), lambda d: d + timedelta(days=7)),
+    "month": ("pjm_zone_monthly_lmps", "CAST(DATE_FORMAT(datetime_beginning_ept, '%%Y-%%m-01') AS DATE)",
+              lambda d: d.replace(day=1), _next_month),
+}
+
+def refresh_zone_hours(cursor, start_dt, end_dt):
+    """
+    Re-aggregates the zone-hour fact table for [start_dt, end_dt) from the
+    pnode-level DA and RT hourly tables, then the rollups above it. Runs on the
+    caller's cursor so it commits together with the upsert that triggered it.
+    """
+    sql = f"""
+    INSERT INTO {ZONE_HOURLY_TABLE} (Transact_Z, datetime_beginning_ept, lmp_da, lmp_rt, lmp_net)
+    SELECT
+        z.Transact_Z,
+        da.datetime_beginning_ept,
+        AVG(da.total_lmp_da),
+        AVG(rt.total_lmp_rt),
+        AVG(rt.total_lmp_rt - da.total_lmp_da)
+    FROM pjm_da_hrl_lmps AS da
+    JOIN pjm_rt_hrl_lmps AS rt ON da.pnode_name = rt.pnode_name AND da.datetime_beginning_ept = rt.datetime_beginning_ept
+    JOIN pjm_lat_long AS ll ON da.pnode_name = ll.Alt_Name
+    JOIN pjm_zone_shapes AS z ON ll.Transact_Z = z.Transact_Z
+    WHERE da.datetime_beginning_ept >= %s AND da.datetime_beginning_ept < %s
+    GROUP BY z.Transact_Z, da.datetime_beginning_ept
+    ON DUPLICATE KEY UPDATE
+        lmp_da = VALUES(lmp_da),
+        lmp_rt = VALUES(lmp_rt),
+        lmp_net = VALUES(lmp_net);
+    """
+    cursor.execute(sql, (start_dt, end_dt))
+    count = cursor.rowcount
+    refresh_zone_rollups(cursor, start_dt, end_dt)
+    return count
+
+def refresh_zone_rollups(cursor, start_dt, end_dt):
+    """
+    Recomputes every daily/weekly/monthly rollup period that overlaps [start_dt, end_dt)
+    from the zone-hour table, so a single refreshed hour re-aggregates its whole
+    day, week and month.
+    """
+    last_day = (end_dt - timedelta(microseconds=1)).date()
+    for table, period_sql, floor, next_period in ZONE_ROLLUPS.values():
+        period_start = floor(start_dt.date())
+        period_end = next_period(floor(last_day))
+        cursor.execute(f"""
+        INSERT INTO {table} (period_start, Transact_Z, n_hours,
+                             da_mean, da_min, da_max, da_std,
+                             rt_mean, rt_min, rt_max, rt_std,
+                             net_mean, net_min, net_max, net_std)
+        SELECT {period_sql} AS period_start, Transact_Z, COUNT(*),
+               AVG(lmp_da), MIN(lmp_da), MAX(lmp_da), STDDEV_POP(lmp_da),
+               AVG(lmp_rt), MIN(lmp_rt), MAX(lmp_rt), STDDEV_POP(lmp_rt),
+               AVG(lmp_net), MIN(lmp_net), MAX(lmp_net), STDDEV_POP(lmp_net)
+        FROM {ZONE_HOURLY_TABLE}
+        WHERE datetime_beginning_ept >= %s AND datetime_beginning_ept < %s
+        GROUP BY period_start, Transact_Z
+        ON DUPLICATE KEY UPDATE
+            n_hours = VALUES(n_hours),
+            da_mean = VALUES(da_mean), da_min = VALUES(da_min), da_max = VALUES(da_max), da_std = VALUES(da_std),
+            rt_mean = VALUES(rt_mean), rt_min = VALUES(rt_min), rt_max = VALUES(rt_max), rt_std = VALUES(rt_std),
+            net_mean = VALUES(net_mean), net_min = VALUES(net_min), net_max = VALUES(net_max), net_std = VALUES(net_std);
+        """, (period_start, period_end))
+
+def notify_backend_cache(start_day=None, end_day=None):
+    """
+    Best effort: asks the API to drop cached query results that touch unverified hours,
+    plus (when history in [start_day, end_day] was rewritten) everything cached over those days.
+    Returns True once the API has acknowledged; a refusal (e.g. 403 on a token mismatch)
+    or server error is logged with its status and body.
+    """
+    if not BACKEND_URL:
+        return False
+    body = {"start_day": start_day.isoformat(), "end_day": end_day.isoformat()} if start_day else None
+    headers = {"X-Cache-Token": CACHE_INVALIDATE_TOKEN} if CACHE_INVALIDATE_TOKEN else None
+    try:
+        resp = requests.post(f"{BACKEND_URL}/api/cache/invalidate", json=body, headers=headers, timeout=5)
+        resp.raise_for_status()
+        return True
+    except requests.HTTPError as e:
+        print(f"      ⚠️ Cache invalidation refused ({e.response.status_code}): {e.response.text[:200]}")
+    except requests.RequestException as e:
+        print(f"      ⚠️ Cache invalidation skipped: {e}")
+    return False
+
+def backfill_zone_hours(start_date, end_date):
+    """Rebuilds the zone-hour table one day at a time (end_date inclusive)."""
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        current_date = start_date
+        while current_date <= end_date:
+            day_start = datetime.combine(current_date, datetime.min.time())
+            count = refresh_zone_hours(cursor, day_start, day_start + timedelta(days=1))
+            conn.commit()
+            print(f"   -> {current_date}: {count} zone-hour rows refreshed.")
+            current_date += timedelta(days=1)
+    finally:
+        conn.close()
+    notify_backend_cache(start_date, end_date)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        try:
+            start = date.fromisoformat(sys.argv[1])
+            end = date.fromisoformat(sys.argv[2])
+        except ValueError:
+            print("Error: Invalid date format. Use YYYY-MM-DD.")
+            sys.exit(1)
+    else:
+        end = date.today()
+        start = end - timedelta(days=30)
+
+    print(f"--- Rebuilding {ZONE_HOURLY_TABLE}: {start} to {end} ---")
+    backfill_zone_hours(start, end)
@@ -0,0 +1,92 @@
+# src/hydrate/db_bulk.py
+#
+# Bulk-load fast path for large backfills. Rows are staged into a per-connection
+# TEMPORARY table (LOAD DATA LOCAL INFILE when the client and server allow it, else
+# large multi-row INSERTs) and merged into the target with one set-based
+# INSERT ... SELECT ... ON DUPLICATE KEY UPDATE, so the indexed target is touched
+# by a single statement instead of one upsert batch per page.
+
+import os
+import tempfile
+from datetime import datetime
+from dotenv import load_dotenv
+
+from db_pool import DB_CONFIG
+
+load_dotenv()
+
+BULK_CHUNK_ROWS = int(os.getenv("HYDRATE_BULK_CHUNK_ROWS", 5000))  # rows per staging INSERT
+BULK_METHODS = ("auto", "infile", "values")
+
+def _stage_name(table):
+    return f"_stage_{table}"
+
+def _tsv_value(value):
+    """LOAD DATA text format: \\N for NULL, backslash-escaped tabs/newlines."""
+    if value is None:
+        return "\\N"
+    text = value.isoformat(sep=" ") if isinstance(value, datetime) else str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+def _stage_infile(cursor, stage, columns, rows):
+    with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False, newline="", encoding="utf-8") as f:
+        for row in rows:
+            f.write("\t".join(_tsv_value(v) for v in row) + "\n")
+        path = f.name
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {stage} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+            (path,)
+        )
+    finally:
+        os.remove(path)
+
+def _stage_values(cursor, stage, columns, rows, chunk_rows):
+    # pymysql folds executemany of a plain INSERT ... VALUES into multi-row statements
+    sql = f"INSERT INTO {stage} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for i in range(0, len(rows), chunk_rows):
+        cursor.executemany(sql, rows[i:i + chunk_rows])
+
+def resolve_bulk_method(method="auto"):
+    if method not in BULK_METHODS:
+        raise ValueError(f"method must be one of {BULK_METHODS}")
+    if method == "auto":
+        return "infile" if DB_CONFIG.get("local_infile") else "values"
+    return method
+
+def bulk_upsert(conn, table, columns, rows, update_columns=None, ignore=False, method="auto", chunk_rows=BULK_CHUNK_ROWS):
+    """
+    Upserts `rows` (tuples in `columns` order) into `table` through a staging table.
+    update_columns are overwritten on key collisions; ignore=True keeps existing rows
+    instead (INSERT IGNORE semantics). Does not commit, so the caller can fold the
+    merge into the same transaction as its follow-up statements. Returns the
+    merge's affected-row count.
+    """
+    if not rows:
+        return 0
+    method = resolve_bulk_method(method)
+    stage = _stage_name(table)
+    column_list = ", ".join(columns)
+
+    with conn.cursor() as cursor:
+        # Temporary tables live as long as the (pooled) connection; start clean
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {stage}")
+        cursor.execute(f"CREATE TEMPORARY TABLE {stage} SELECT {column_list} FROM {table} LIMIT 0")
+        try:
+            if method == "infile":
+                _stage_infile(cursor, stage, columns, rows)
+            else:
+                _stage_values(cursor, stage, columns, rows, chunk_rows)
+
+            if ignore:
+                merge = f"INSERT IGNORE INTO {table} ({column_list}) SELECT {column_list} FROM {stage}"
+            else:
+                updates = ", ".join(f"{c} = VALUES({c})" for c in (update_columns or []))
+                merge = f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage}"
+                if updates:
+                    merge += f" ON DUPLICATE KEY UPDATE {updates}"
+            cursor.execute(merge)
+            return cursor.rowcount
+        finally:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {stage}")
@@ -1,148 +1,147 @@
 # src/hydrate/dailysync.py
 
 import os
-import sys
-import subprocess
-import requests
-import pymysql
-from pymysql.cursors import DictCursor
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from datetime import date, timedelta, datetime
 
+from db_aggregates import refresh_zone_hours, notify_backend_cache
+from pjm_api import get_client, PJMPartialFetchError, PNODE_IDS
+from db_pool import connect
+from pjm_query_da_lmp import fetch_and_upsert_pjm_da_lmp_data_pymysql
+from pjm_query_rt_constraints import backfill_constraints
+from pjm_query_rt_verified import VERIFIED_FEED, VERIFIED_FIELDS, upsert_verified_rt_items
+from db_state import get_watermark, SOURCE_DA_LMPS, SOURCE_CONSTRAINTS
+from db_gaps import repair_gaps, GAP_SCAN_DAYS
+
 load_dotenv()
 
-PJM_API_KEY = os.getenv("PJM_API_KEY")
-
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME"),
-    "port": int(os.getenv("DB_PORT", 3306)),
-    "cursorclass": DictCursor
-}
-
-PNODE_IDS = [
-    51217, 51288, 4669664, 5413134, 31252687, 33092311, 33092313,
-    33092315, 34497125, 34497127, 34497151, 35010337, 40523629,
-    56958967, 81436855, 116013751, 116472927, 116472931, 116472933,
-    116472935, 116472937, 116472939, 116472941, 116472943,
-    116472945, 116472947, 116472949, 116472951, 116472953,
-    116472955, 116472957, 116472959, 126769999, 1069452904,
-    1124361945, 1127872598, 1258625176, 1269364670, 1269364671,
-    1269364672, 1269364674, 1288248099, 1304468347, 1441662202,
-    1709726615, 2156111904
-]
+# Backfill tasks run concurrently in-process; they share the DB pool and the PJM rate limiter
+SYNC_WORKERS = int(os.getenv("DAILYSYNC_WORKERS", 2))
 
-SUBPROCESS_TASKS = [
+SYNC_TASKS = [
     {
         "name": "Day-Ahead Hourly LMP",
         "table": "pjm_da_hrl_lmps",
         "date_col": "datetime_beginning_ept",
-        "script": "pjm_query_da_lmp.py"
+        "source": SOURCE_DA_LMPS,
+        "whole_days": True,  # published a day at a time
+        "run": fetch_and_upsert_pjm_da_lmp_data_pymysql
     },
     {
         "name": "Binding Constraints (Backfill)",
         "table": "pjm_binding_constraints",
         "date_col": "datetime_beginning_ept",
-        "script": "pjm_query_rt_constraints.py"
+        "source": SOURCE_CONSTRAINTS,
+        "whole_days": False,
+        "run": backfill_constraints
     }
 ]
 
-def get_latest_db_date(table_name, date_col):
-    conn = None
+def get_latest_db_time(table_name, date_col):
+    """MAX of the bare column (index-friendly); only used until a watermark exists."""
+    conn = connect()
     try:
-        conn = pymysql.connect(**DB_CONFIG)
         with conn.cursor() as cursor:
-            sql = f"SELECT MAX(DATE({date_col})) as max_date FROM {table_name}"
-            cursor.execute(sql)
+            cursor.execute(f"SELECT MAX({date_col}) as max_time FROM {table_name}")
             result = cursor.fetchone()
-            if result and result['max_date']:
-                val = result['max_date']
-                if isinstance(val, str): return datetime.strptime(val, "%Y-%m-%d").date()
-                if isinstance(val, datetime): return val.date()
-                return val
-            return None
-    except Exception as e:
-        print(f"      [!] DB Check Error ({table_name}): {e}")
-        return None
+            return result['max_time'] if result else None
     finally:
-        if conn: conn.close()
+        conn.close()
 
-def run_subprocess_task(script_relative_path, start_date, end_date):
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    script_path = os.path.join(current_dir, script_relative_path)
-    start_str = start_date.strftime("%Y-%m-%d")
-    end_str = end_date.strftime("%Y-%m-%d")
-    
-    print(f"      ▶️ Running {script_relative_path} ({start_str} to {end_str})...")
+def get_resume_point(task):
+    """The task's ingestion_state watermark, falling back to its table's MAX()."""
     try:
-        subprocess.run([sys.executable, script_path, start_str, end_str], check=True)
+        watermark = get_watermark(task['source'])
+        if watermark is None:
+            watermark = get_latest_db_time(task['table'], task['date_col'])
+        if isinstance(watermark, str):
+            watermark = datetime.fromisoformat(watermark)
+        return watermark
     except Exception as e:
-        print(f"      ❌ Failed to run {script_relative_path}: {e}")
+        print(f"      [!] DB Check Error ({task['table']}): {e}")
+        return None
 
-def sync_subprocess_tasks():
+def run_sync_task(task):
+    """Brings one table up to tomorrow. Returns seconds spent, or None if already current."""
     target_date = date.today() + timedelta(days=1)
-    for task in SUBPROCESS_TASKS:
-        last_date = get_latest_db_date(task['table'], task['date_col'])
-        
-        if last_date is None:
-            # First run ever: go back 30 days
-            start_date = date.today() - timedelta(days=30)
-            run_subprocess_task(task['script'], start_date, target_date)
-        elif last_date < target_date:
-            # Self Healing Start
-            start_date = last_date 
-            run_subprocess_task(task['script'], start_date, target_date)
-        else:
-            print(f"      🔹 {task['name']} is up to date.")
+    watermark = get_resume_point(task)
+    
+    if watermark is None:
+        # First run ever: go back 30 days
+        start = date.today() - timedelta(days=30)
+    elif task['whole_days']:
+        # Resume at the first day not fully saved
+        start = (watermark + timedelta(hours=1)).date()
+    else:
+        # Resume exactly; re-saving the boundary interval is a no-op
+        start = watermark
+
+    start_day = start.date() if isinstance(start, datetime) else start
+    if start_day > target_date:
+        print(f"      🔹 {task['name']} is up to date.")
+        return None
+
+    print(f"      ▶️ Running {task['name']} ({start} to {target_date})...")
+    started = time.perf_counter()
+    task['run'](start, target_date)
+    return time.perf_counter() - started
+
+def sync_backfill_tasks():
+    """Runs every SYNC_TASKS entry on a worker pool and reports per-task timings."""
+    timings = {}
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+        futures = {pool.submit(run_sync_task, task): task['name'] for task in SYNC_TASKS}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                timings[name] = future.result()
+            except Exception as e:
+                print(f"      ❌ {name} failed: {e}")
+                timings[name] = "failed"
+    return timings
 
 def sync_verified_rt_prices():
     print("      🔍 Checking for Official Verified RT Data (Last 5 Days)...")
-    VERIFIED_ENDPOINT = 'https://api.pjm.com/api/v1/rt_hrl_lmps'
     end_dt = datetime.now()
     start_dt = end_dt - timedelta(days=5)
     
     params = {
-        'rowCount': 100000, 'startRow': 1,
         'datetime_beginning_ept': f"{start_dt.strftime('%Y-%m-%d %H:%M:%S')} to {end_dt.strftime('%Y-%m-%d %H:%M:%S')}",
-        'fields': 'datetime_beginning_ept,pnode_id,total_lmp_rt,congestion_price_rt,marginal_loss_price_rt'
+        'fields': VERIFIED_FIELDS
     }
-    headers = {'Ocp-Apim-Subscription-Key': PJM_API_KEY}
+    n_hours = (end_dt - start_dt).total_seconds() / 3600
     
     try:
-        response = requests.get(VERIFIED_ENDPOINT, headers=headers, params=params, timeout=60)
-        response.raise_for_status()
-        items = response.json().get('items', [])
-        
-        target_ids = set(PNODE_IDS)
-        filtered = [i for i in items if i.get('pnode_id') in target_ids]
-        
-        if not filtered:
-            print("      🔹 No new verified data found.")
-            return
-
-        conn = pymysql.connect(**DB_CONFIG)
+        conn = connect()
         cursor = conn.cursor()
         try:
-            sql_price = """
-            INSERT INTO pjm_rt_hrl_lmps 
-            (datetime_beginning_ept, pnode_id, total_lmp_rt, congestion_price_rt, marginal_loss_price_rt)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                total_lmp_rt = VALUES(total_lmp_rt),
-                congestion_price_rt = VALUES(congestion_price_rt),
-                marginal_loss_price_rt = VALUES(marginal_loss_price_rt)
-            """
-            rows = [(i['datetime_beginning_ept'], i['pnode_id'], i['total_lmp_rt'], i['congestion_price_rt'], i['marginal_loss_price_rt']) for i in filtered]
-            cursor.executemany(sql_price, rows)
+            # Only our pnodes are requested or kept; each page is upserted as it lands
+            row_count = 0
+            unique_timestamps = set()
+            try:
+                for filtered in get_client().iter_pnode_pages(VERIFIED_FEED, params, PNODE_IDS, n_hours, rows_per_hour=1):
+                    unique_timestamps.update(upsert_verified_rt_items(cursor, filtered))
+                    row_count += len(filtered)
+            except PJMPartialFetchError as e:
+                # Hours are marked 'v' for every pnode at once, so a partial pull is not committed;
+                # the rolling 5-day window retries it on the next sweep
+                conn.rollback()
+                print(f"      ⚠️ {e}; verified data not saved, retrying next sweep.")
+                return
             
-            unique_timestamps = set(i['datetime_beginning_ept'] for i in filtered)
-            sql_status = "INSERT INTO pjm_hourly_status (datetime_beginning_ept, status) VALUES (%s, 'v') ON DUPLICATE KEY UPDATE status = 'v';"
-            cursor.executemany(sql_status, [(t,) for t in unique_timestamps])
+            if not unique_timestamps:
+                print("      🔹 No new verified data found.")
+                return
+
+            first_hour = datetime.fromisoformat(min(unique_timestamps))
+            last_hour = datetime.fromisoformat(max(unique_timestamps))
+            refresh_zone_hours(cursor, first_hour, last_hour + timedelta(hours=1))
             
             conn.commit()
-            print(f"      ✨ Synced {len(rows)} Verified rows. Status set to 'v'.")
+            print(f"      ✨ Synced {row_count} Verified rows. Status set to 'v'.")
+            notify_backend_cache(first_hour.date(), last_hour.date())
         finally:
             conn.close()
     except Exception as e:
@@ -150,9 +149,27 @@ def sync_verified_rt_prices():
 
 def run_all_syncs():
     print("\n📦 STARTING BACKGROUND SYNC...")
-    sync_subprocess_tasks()
+    sweep_start = time.perf_counter()
+    timings = sync_backfill_tasks()
+    # After the backfills: its zone-hour refresh overlaps the Day-Ahead one
+    verified_start = time.perf_counter()
     sync_verified_rt_prices()
-    print("📦 BACKGROUND SYNC COMPLETE.\n")
+    timings["Verified RT Prices"] = time.perf_counter() - verified_start
+
+    # Holes inside the recent history (e.g. a PNode request that failed and was skipped)
+    gaps_start = time.perf_counter()
+    scan_end = date.today() - timedelta(days=1)
+    repair_gaps(scan_end - timedelta(days=GAP_SCAN_DAYS - 1), scan_end)
+    timings["Gap Repair"] = time.perf_counter() - gaps_start
+
+    print("   ⏱️  Task timings:")
+    for name, seconds in timings.items():
+        if seconds is None:
+            seconds = "up to date"
+        elif not isinstance(seconds, str):
+            seconds = f"{seconds:.1f}s"
+        print(f"      {name:<34}{seconds}")
+    print(f"📦 BACKGROUND SYNC COMPLETE in {time.perf_counter() - sweep_start:.1f}s.\n")
 
 if __name__ == "__main__":
     run_all_syncs()
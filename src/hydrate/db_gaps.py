@@ -0,0 +1,275 @@
+# src/hydrate/db_gaps.py
+#
+# Finds holes inside the stored history and refetches only those, instead of
+# re-backfilling whole ranges (e.g. a PNode whose Day-Ahead request failed and was
+# skipped). Hourly pnode tables are read as one 24-bit hour bitmap per (pnode, day):
+#
+#   SELECT pnode_id, DATE(ts), BIT_OR(1 << HOUR(ts)) ... GROUP BY pnode_id, DATE(ts)
+#
+# a range scan returning one small row per pnode-day, compared here against the hours
+# that exist that day in EPT (23 on the spring DST change). Missing cells become
+# per-pnode runs, nearby runs are merged, and identical runs across pnodes share one
+# request. Constraints are sparse, so there a day with no records at all is the gap.
+#
+# Some cells never fill (pnodes PJM does not publish, days with no binding
+# constraint). Once a refetch comes back empty for a day older than GAP_SETTLE_DAYS,
+# the cell goes into gap_empty_cells (migration 007) and later scans treat it as present.
+#
+#   python db_gaps.py 2024-01-01 2024-12-31 [--dry-run]
+
+import os
+import sys
+from collections import defaultdict
+from dotenv import load_dotenv
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from db_pool import connect
+from pjm_api import get_client, PJMPartialFetchError, PNODE_IDS
+from db_aggregates import refresh_zone_hours, notify_backend_cache
+from pjm_query_da_lmp import DA_FEED, upsert_da_items
+from pjm_query_rt_verified import VERIFIED_FEED, VERIFIED_FIELDS, upsert_verified_rt_items
+from pjm_query_rt_constraints import TABLE_NAME as CONSTRAINTS_TABLE, fetch_and_save_constraints
+
+load_dotenv()
+
+GAP_SCAN_DAYS = int(os.getenv("GAP_SCAN_DAYS", 30))  # trailing days the daily sync checks
+GAP_MERGE_HOURS = int(os.getenv("GAP_MERGE_HOURS", 6))  # runs this close share one request
+GAP_SETTLE_DAYS = int(os.getenv("GAP_SETTLE_DAYS", 7))  # younger days may still be published; never recorded empty
+
+EMPTY_CELLS_TABLE = "gap_empty_cells"
+CONSTRAINTS_SOURCE = "constraints"  # recorded with pnode_id 0, one row per day
+
+EPT = ZoneInfo("America/New_York")
+
+def _save_verified(conn, items):
+    with conn.cursor() as cursor:
+        upsert_verified_rt_items(cursor, items)
+
+# Hourly pnode tables: (table, feed, fields, save(conn, items) without commit)
+HOURLY_SOURCES = {
+    "da": ("pjm_da_hrl_lmps", DA_FEED, None, upsert_da_items),
+    "rt": ("pjm_rt_hrl_lmps", VERIFIED_FEED, VERIFIED_FIELDS, _save_verified),
+}
+
+def expected_hour_mask(day):
+    """Bitmap of the EPT hours that exist on `day` (the skipped spring-forward hour is left out)."""
+    mask = 0
+    for hour in range(24):
+        local = datetime(day.year, day.month, day.day, hour)
+        round_trip = local.replace(tzinfo=EPT).astimezone(timezone.utc).astimezone(EPT).replace(tzinfo=None)
+        if round_trip == local:
+            mask |= 1 << hour
+    return mask
+
+def scan_hour_bitmap(cursor, table, start_day, end_day, pnode_ids):
+    """{(pnode_id, day): hour bitmap} of what `table` holds for [start_day, end_day]."""
+    cursor.execute(f"""
+        SELECT pnode_id, DATE(datetime_beginning_ept) AS day, BIT_OR(1 << HOUR(datetime_beginning_ept)) AS hours
+        FROM {table}
+        WHERE datetime_beginning_ept >= %s AND datetime_beginning_ept < %s AND pnode_id IN %s
+        GROUP BY pnode_id, day
+    """, (start_day, end_day + timedelta(days=1), tuple(pnode_ids)))
+    return {(row['pnode_id'], row['day']): int(row['hours']) for row in cursor.fetchall()}
+
+def load_empty_cells(cursor, source, start_day, end_day):
+    """{(pnode_id, day): hour bitmap} recorded as fetched-but-empty for `source`."""
+    cursor.execute(f"""
+        SELECT pnode_id, day, hours FROM {EMPTY_CELLS_TABLE}
+        WHERE source = %s AND day >= %s AND day <= %s
+    """, (source, start_day, end_day))
+    return {(row['pnode_id'], row['day']): int(row['hours']) for row in cursor.fetchall()}
+
+def record_empty_cells(cursor, source, cells):
+    """Adds {(pnode_id, day): hour bitmap} to the known-empty cells. Does not commit."""
+    if not cells:
+        return
+    cursor.executemany(f"""
+        INSERT INTO {EMPTY_CELLS_TABLE} (source, pnode_id, day, hours) VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE hours = hours | VALUES(hours)
+    """, [(source, pnode_id, day, hours) for (pnode_id, day), hours in cells.items()])
+
+def find_missing_hours(bitmaps, pnode_ids, start_day, end_day, until=None):
+    """{pnode_id: [missing hour starts]} for expected cells absent from `bitmaps`, before `until`."""
+    missing = defaultdict(list)
+    day = start_day
+    while day <= end_day:
+        expected = expected_hour_mask(day)
+        for pnode_id in pnode_ids:
+            absent = expected & ~bitmaps.get((pnode_id, day), 0)
+            for hour in range(24):
+                if absent >> hour & 1:
+                    hour_start = datetime(day.year, day.month, day.day, hour)
+                    if until is None or hour_start < until:
+                        missing[pnode_id].append(hour_start)
+        day += timedelta(days=1)
+    return missing
+
+def merge_runs(points, step, merge_within):
+    """Sorted points -> [(first, last)] runs, joining runs separated by at most `merge_within`."""
+    runs = []
+    for point in sorted(points):
+        if runs and point - runs[-1][1] <= step + merge_within:
+            runs[-1][1] = point
+        else:
+            runs.append([point, point])
+    return [tuple(run) for run in runs]
+
+def plan_refetches(missing, merge_hours=GAP_MERGE_HOURS):
+    """
+    [(first_hour, last_hour, [pnode_ids])] covering every missing cell. A few present
+    hours inside a merged run are refetched too, since one more request costs more
+    quota than the extra rows.
+    """
+    windows = defaultdict(list)
+    for pnode_id, hours in missing.items():
+        for run in merge_runs(hours, timedelta(hours=1), timedelta(hours=merge_hours)):
+            windows[run].append(pnode_id)
+    return sorted((first, last, sorted(pnode_ids)) for (first, last), pnode_ids in windows.items())
+
+def repair_hourly(source, start_day, end_day, dry_run=False):
+    """Scans one hourly source and refetches its gaps. Returns (missing cells, rows saved)."""
+    table, feed, fields, save = HOURLY_SOURCES[source]
+    now = datetime.now()
+    settled_before = now.date() - timedelta(days=GAP_SETTLE_DAYS)
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        bitmaps = scan_hour_bitmap(cursor, table, start_day, end_day, PNODE_IDS)
+        for cell, hours in load_empty_cells(cursor, source, start_day, end_day).items():
+            bitmaps[cell] = bitmaps.get(cell, 0) | hours
+        missing = find_missing_hours(bitmaps, PNODE_IDS, start_day, end_day, until=now.replace(minute=0, second=0, microsecond=0))
+        plan = plan_refetches(missing)
+        n_missing = sum(len(hours) for hours in missing.values())
+        print(f"   🕳️  {table}: {n_missing} missing pnode-hours -> {len(plan)} refetch window(s)")
+        if dry_run or not plan:
+            for first, last, pnode_ids in plan:
+                print(f"      {first} to {last}: {len(pnode_ids)} pnode(s)")
+            return n_missing, 0
+
+        client = get_client()
+        saved = 0
+        for first, last, pnode_ids in plan:
+            params = {
+                'order': 'Asc',
+                'datetime_beginning_ept': f"{first.strftime('%Y-%m-%d %H:%M:%S')} to {(last + timedelta(minutes=59, seconds=59)).strftime('%Y-%m-%d %H:%M:%S')}",
+            }
+            if fields:
+                params['fields'] = fields
+            n_hours = (last - first) / timedelta(hours=1) + 1
+            try:
+                returned = set()
+                failed = {}
+                window_saved = 0
+                try:
+                    for page in client.iter_pnode_pages(feed, params, pnode_ids, n_hours, rows_per_hour=1):
+                        save(conn, page)
+                        window_saved += len(page)
+                        returned.update((item['pnode_id'], datetime.fromisoformat(item['datetime_beginning_ept'])) for item in page)
+                except PJMPartialFetchError as e:
+                    # Keep what the other pnodes returned; the failed ones stay gaps for the next scan
+                    failed = e.failed
+                    print(f"      ⚠️ {e}")
+                # Requested cells a successful refetch still had nothing for
+                empty = defaultdict(int)
+                for pnode_id in pnode_ids:
+                    if pnode_id in failed:
+                        continue
+                    for hour_start in missing[pnode_id]:
+                        if first <= hour_start <= last and hour_start.date() < settled_before and (pnode_id, hour_start) not in returned:
+                            empty[(pnode_id, hour_start.date())] |= 1 << hour_start.hour
+                record_empty_cells(cursor, source, empty)
+                refresh_zone_hours(cursor, first, last + timedelta(hours=1))
+                conn.commit()
+                saved += window_saved
+            except Exception as e:
+                conn.rollback()
+                print(f"      ⚠️ Repair failed ({table} {first} to {last}): {e}")
+        print(f"      🩹 {table}: refetched {saved} rows.")
+        return n_missing, saved
+    finally:
+        conn.close()
+
+def constraint_days(cursor, start_day, end_day):
+    """Days in [start_day, end_day] with at least one constraint record."""
+    cursor.execute(f"""
+        SELECT DISTINCT DATE(hour_bucket) AS day FROM {CONSTRAINTS_TABLE}
+        WHERE hour_bucket >= %s AND hour_bucket < %s
+    """, (start_day, end_day + timedelta(days=1)))
+    return {row['day'] for row in cursor.fetchall()}
+
+def repair_constraints(start_day, end_day, dry_run=False):
+    """
+    Refetches days in [start_day, end_day] with no constraint records, except days
+    already recorded as having none. Returns (missing days, rows saved).
+    """
+    settled_before = date.today() - timedelta(days=GAP_SETTLE_DAYS)
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            present = constraint_days(cursor, start_day, end_day)
+            present |= {day for _, day in load_empty_cells(cursor, CONSTRAINTS_SOURCE, start_day, end_day)}
+
+        last_day = min(end_day, date.today() - timedelta(days=1))
+        missing = [start_day + timedelta(days=i) for i in range((last_day - start_day).days + 1)]
+        missing = [day for day in missing if day not in present]
+        runs = merge_runs(missing, timedelta(days=1), timedelta(0))
+        print(f"   🕳️  {CONSTRAINTS_TABLE}: {len(missing)} day(s) without records -> {len(runs)} refetch window(s)")
+        if dry_run:
+            for first, last in runs:
+                print(f"      {first} to {last}")
+            return len(missing), 0
+
+        saved = 0
+        for first, last in runs:
+            try:
+                _, inserted, _ = fetch_and_save_constraints(conn, datetime.combine(first, datetime.min.time()), datetime.combine(last, datetime.max.time()))
+                saved += inserted
+                with conn.cursor() as cursor:
+                    filled = constraint_days(cursor, first, last)
+                    record_empty_cells(cursor, CONSTRAINTS_SOURCE, {
+                        (0, day): expected_hour_mask(day) for day in missing
+                        if first <= day <= last and day < settled_before and day not in filled
+                    })
+                conn.commit()
+            except Exception as e:
+                print(f"      ⚠️ Repair failed ({CONSTRAINTS_TABLE} {first} to {last}): {e}")
+        if runs:
+            print(f"      🩹 {CONSTRAINTS_TABLE}: refetched {saved} rows.")
+        return len(missing), saved
+    finally:
+        conn.close()
+
+def repair_gaps(start_day, end_day, dry_run=False):
+    """Scans and repairs every source over [start_day, end_day]. Returns {source: (missing, saved)}."""
+    print(f"   🔎 Scanning for gaps: {start_day} to {end_day}{' (dry run)' if dry_run else ''}")
+    results = {}
+    for source in HOURLY_SOURCES:
+        try:
+            results[source] = repair_hourly(source, start_day, end_day, dry_run)
+        except Exception as e:
+            print(f"      ⚠️ Gap scan failed ({source}): {e}")
+    try:
+        results["constraints"] = repair_constraints(start_day, end_day, dry_run)
+    except Exception as e:
+        print(f"      ⚠️ Gap scan failed (constraints): {e}")
+
+    if any(saved for _, saved in results.values()):
+        notify_backend_cache(start_day, end_day)
+    return results
+
+if __name__ == "__main__":
+    dry_run = "--dry-run" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--dry-run"]
+    if len(args) > 1:
+        try:
+            start = date.fromisoformat(args[0])
+            end = date.fromisoformat(args[1])
+        except ValueError:
+            print("Error: Invalid date format. Use YYYY-MM-DD.")
+            sys.exit(1)
+    else:
+        end = date.today() - timedelta(days=1)
+        start = end - timedelta(days=GAP_SCAN_DAYS - 1)
+
+    repair_gaps(start, end, dry_run)
@@ -0,0 +1,174 @@
+# src/hydrate/db_migrate.py
+
+import os
+import sys
+from dotenv import load_dotenv
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from db_pool import connect
+
+load_dotenv()
+
+# Ordered list of (name, [statements]). Append new migrations to the end;
+# never edit one that has already been applied.
+MIGRATIONS = [
+    ("001_zone_hourly_lmps", [
+        """
+        CREATE TABLE IF NOT EXISTS pjm_zone_hrl_lmps (
+            datetime_beginning_ept DATETIME NOT NULL,
+            Transact_Z VARCHAR(64) NOT NULL,
+            lmp_da DECIMAL(12, 5) NULL,
+            lmp_rt DECIMAL(12, 5) NULL,
+            lmp_net DECIMAL(12, 5) NULL,
+            PRIMARY KEY (datetime_beginning_ept, Transact_Z)
+        )
+        """
+    ]),
+    ("002_calendar_columns", [
+        # Stored generated columns are computed for existing rows when the
+        # ALTER rebuilds the table, so this also backfills history.
+        *[
+            f"""
+            ALTER TABLE {table}
+                ADD COLUMN hour_of_day TINYINT AS (HOUR(datetime_beginning_ept)) STORED,
+                ADD COLUMN dow TINYINT AS (DAYOFWEEK(datetime_beginning_ept)) STORED,
+                ADD COLUMN hour_bucket DATETIME AS (CAST(DATE_FORMAT(datetime_beginning_ept, '%Y-%m-%d %H:00:00') AS DATETIME)) STORED,
+                ADD INDEX ix_calendar (dow, hour_of_day, datetime_beginning_ept)
+            """
+            for table in ("pjm_zone_hrl_lmps", "pjm_da_hrl_lmps", "pjm_rt_hrl_lmps", "pjm_binding_constraints")
+        ],
+        "ALTER TABLE pjm_binding_constraints ADD INDEX ix_hour_bucket (hour_bucket, monitored_facility)",
+    ]),
+    ("003_constraint_hours", [
+        """
+        CREATE TABLE IF NOT EXISTS pjm_constraint_hours (
+            monitored_facility VARCHAR(255) NOT NULL,
+            hour_beginning DATETIME NOT NULL,
+            PRIMARY KEY (monitored_facility, hour_beginning)
+        )
+        """,
+        """
+        INSERT IGNORE INTO pjm_constraint_hours (monitored_facility, hour_beginning)
+        SELECT DISTINCT monitored_facility, hour_bucket
+        FROM pjm_binding_constraints
+        WHERE monitored_facility IS NOT NULL
+        """
+    ]),
+    ("004_constraint_facilities", [
+        """
+        CREATE TABLE IF NOT EXISTS pjm_constraint_facilities (
+            monitored_facility VARCHAR(255) NOT NULL PRIMARY KEY,
+            first_seen DATETIME NOT NULL,
+            last_seen DATETIME NOT NULL,
+            binding_hours INT NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO pjm_constraint_facilities (monitored_facility, first_seen, last_seen, binding_hours)
+        SELECT monitored_facility, MIN(hour_beginning), MAX(hour_beginning), COUNT(*)
+        FROM pjm_constraint_hours
+        GROUP BY monitored_facility
+        """
+    ]),
+    ("005_zone_rollups", [
+        # Daily / weekly (Monday start) / monthly zone statistics over the zone-hour table
+        *[
+            statement
+            for table, period_sql in (
+                ("pjm_zone_daily_lmps", "DATE(datetime_beginning_ept)"),
+                ("pjm_zone_weekly_lmps", "DATE_SUB(DATE(datetime_beginning_ept), INTERVAL WEEKDAY(datetime_beginning_ept) DAY)"),
+                ("pjm_zone_monthly_lmps", "CAST(DATE_FORMAT(datetime_beginning_ept, '%Y-%m-01') AS DATE)"),
+            )
+            for statement in (
+                f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    period_start DATE NOT NULL,
+                    Transact_Z VARCHAR(64) NOT NULL,
+                    n_hours SMALLINT NOT NULL,
+                    da_mean DECIMAL(12, 5) NULL, da_min DECIMAL(12, 5) NULL, da_max DECIMAL(12, 5) NULL, da_std DECIMAL(12, 5) NULL,
+                    rt_mean DECIMAL(12, 5) NULL, rt_min DECIMAL(12, 5) NULL, rt_max DECIMAL(12, 5) NULL, rt_std DECIMAL(12, 5) NULL,
+                    net_mean DECIMAL(12, 5) NULL, net_min DECIMAL(12, 5) NULL, net_max DECIMAL(12, 5) NULL, net_std DECIMAL(12, 5) NULL,
+                    PRIMARY KEY (period_start, Transact_Z)
+                )
+                """,
+                f"""
+                INSERT INTO {table}
+                SELECT {period_sql} AS period_start, Transact_Z, COUNT(*),
+                       AVG(lmp_da), MIN(lmp_da), MAX(lmp_da), STDDEV_POP(lmp_da),
+                       AVG(lmp_rt), MIN(lmp_rt), MAX(lmp_rt), STDDEV_POP(lmp_rt),
+                       AVG(lmp_net), MIN(lmp_net), MAX(lmp_net), STDDEV_POP(lmp_net)
+                FROM pjm_zone_hrl_lmps
+                GROUP BY period_start, Transact_Z
+                """,
+            )
+        ],
+    ]),
+    ("006_ingestion_state", [
+        """
+        CREATE TABLE IF NOT EXISTS ingestion_state (
+            source VARCHAR(64) NOT NULL PRIMARY KEY,
+            watermark DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+        """,
+        # Seed each source from the table it tracks (see db_state.py)
+        *[
+            f"""
+            INSERT INTO ingestion_state (source, watermark)
+            SELECT '{source}', MAX(datetime_beginning_ept) FROM {table}
+            HAVING MAX(datetime_beginning_ept) IS NOT NULL
+            """
+            for source, table in (
+                ("da_hrl_lmps", "pjm_da_hrl_lmps"),
+                ("binding_constraints", "pjm_binding_constraints"),
+                ("rt_hrl_lmps", "pjm_rt_hrl_lmps"),
+            )
+        ],
+    ]),
+    ("007_gap_empty_cells", [
+        # Cells db_gaps refetched and PJM returned nothing for; skipped by later scans
+        """
+        CREATE TABLE IF NOT EXISTS gap_empty_cells (
+            source VARCHAR(32) NOT NULL,
+            pnode_id BIGINT NOT NULL,
+            day DATE NOT NULL,
+            hours INT UNSIGNED NOT NULL,
+            checked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, pnode_id, day)
+        )
+        """,
+    ]),
+]
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name VARCHAR(128) NOT NULL PRIMARY KEY,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def run_migrations():
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            ensure_migrations_table(cursor)
+            cursor.execute("SELECT name FROM schema_migrations")
+            applied = {row['name'] for row in cursor.fetchall()}
+
+            for name, statements in MIGRATIONS:
+                if name in applied:
+                    continue
+                print(f"   🛠️  Applying {name}...")
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+                conn.commit()
+        print("✅ Schema is up to date.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,131 @@
+# src/hydrate/db_pool.py
+#
+# Process-wide pymysql connection pool shared by every hydrate script. connect() is
+# a drop-in for pymysql.connect(**DB_CONFIG): the returned connection's close()
+# hands it back to the pool, so the watchdog's hourly cycle (and catch-up runs over
+# many hours) reuse a few live RDS connections instead of a TLS handshake per step.
+
+import os
+import time
+import threading
+from collections import deque
+import pymysql
+from pymysql.cursors import DictCursor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "database": os.getenv("DB_NAME"),
+    "port": int(os.getenv("DB_PORT", 3306)),
+    "cursorclass": DictCursor,
+    # LOAD DATA LOCAL INFILE for db_bulk; the server needs local_infile=ON as well
+    "local_infile": os.getenv("HYDRATE_DB_LOCAL_INFILE", "false").lower() == "true"
+}
+
+HYDRATE_DB_POOL_SIZE = int(os.getenv("HYDRATE_DB_POOL_SIZE", 4))  # idle connections kept
+HYDRATE_DB_PING_AFTER = int(os.getenv("HYDRATE_DB_PING_AFTER", 30))  # idle seconds before a checkout pings
+HYDRATE_DB_POOL_RECYCLE = int(os.getenv("HYDRATE_DB_POOL_RECYCLE", 1800))  # keep below the RDS idle timeout
+
+class ConnectionPool:
+    """
+    Keeps up to max_idle open connections. A checkout reuses the most recently returned
+    one, pinging it (with reconnect) if it sat idle longer than ping_after and replacing
+    it once it is older than recycle. Returned connections are rolled back first, so
+    uncommitted work never leaks into the next caller.
+    """
+    def __init__(self, config, max_idle, ping_after, recycle):
+        self.config = config
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self.recycle = recycle
+        self._idle = deque()  # (conn, opened_at, returned_at)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def _open(self):
+        self.opened += 1
+        return pymysql.connect(**self.config), time.monotonic()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                return self._open()
+
+            conn, opened_at, returned_at = entry
+            now = time.monotonic()
+            if now - opened_at > self.recycle:
+                _close_quietly(conn)
+                continue
+            if now - returned_at > self.ping_after:
+                try:
+                    conn.ping(reconnect=True)
+                except pymysql.Error:
+                    _close_quietly(conn)
+                    continue
+            self.reused += 1
+            return conn, opened_at
+
+    def release(self, conn, opened_at):
+        try:
+            if not conn.open:
+                return
+            conn.rollback()
+        except pymysql.Error:
+            _close_quietly(conn)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((conn, opened_at, time.monotonic()))
+                return
+        _close_quietly(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _, _ in idle:
+            _close_quietly(conn)
+
+class PooledConnection:
+    """Proxy for a pooled pymysql connection; close() returns it to the pool instead of disconnecting."""
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = None
+        self._conn, self._opened_at = pool.acquire()
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise pymysql.InterfaceError("Connection already returned to the pool.")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn, self._opened_at)
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+pool = ConnectionPool(DB_CONFIG, HYDRATE_DB_POOL_SIZE, HYDRATE_DB_PING_AFTER, HYDRATE_DB_POOL_RECYCLE)
+
+def connect():
+    """Pooled replacement for pymysql.connect(**DB_CONFIG)."""
+    return PooledConnection(pool)
@@ -0,0 +1,39 @@
+# src/hydrate/db_state.py
+#
+# Per-source ingestion watermarks (migration 006_ingestion_state). Writers advance a
+# source's watermark on the cursor of the upsert batch it describes, so it commits or
+# rolls back with that data; readers find their resume point with a primary-key
+# lookup instead of MAX() over an ever-growing table.
+
+from datetime import datetime
+
+from db_pool import connect
+
+INGESTION_STATE_TABLE = "ingestion_state"
+
+# Sources and the table each one tracks
+SOURCE_DA_LMPS = "da_hrl_lmps"                   # latest Day-Ahead hour saved
+SOURCE_CONSTRAINTS = "binding_constraints"       # latest binding-constraint interval saved
+SOURCE_RT_HOURLY = "rt_hrl_lmps"                 # latest hour aggregated from 5-minute LMPs
+
+def advance_watermark(cursor, source, watermark):
+    """Moves `source` forward to `watermark` (never backwards). Does not commit."""
+    if watermark is None:
+        return
+    if isinstance(watermark, str):
+        watermark = datetime.fromisoformat(watermark)
+    cursor.execute(f"""
+        INSERT INTO {INGESTION_STATE_TABLE} (source, watermark) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE watermark = GREATEST(watermark, VALUES(watermark))
+    """, (source, watermark))
+
+def get_watermark(source):
+    """The source's watermark as a datetime, or None if nothing has been recorded yet."""
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT watermark FROM {INGESTION_STATE_TABLE} WHERE source = %s", (source,))
+            row = cursor.fetchone()
+            return row['watermark'] if row else None
+    finally:
+        conn.close()
@@ -2,8 +2,7 @@
 
 import os
 import sys
-import time
-import pymysql
+import asyncio
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
@@ -12,30 +11,41 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(current_dir)
 sys.path.append(parent_dir)
 
-from pjm_query_rt_5min_unver import fetch_and_upsert_batch
-from pjm_query_rt_constraints import fetch_constraints_batch 
-from db_dailysync import run_all_syncs, DB_CONFIG
+from pjm_query_rt_5min_unver import iter_fivemin_pages, save_to_db
+from pjm_query_rt_constraints import iter_constraint_pages, save_data_to_mysql
+from db_dailysync import run_all_syncs
+from db_aggregates import refresh_zone_hours, notify_backend_cache
+from db_pool import connect
+from db_state import get_watermark, advance_watermark, INGESTION_STATE_TABLE, SOURCE_RT_HOURLY, SOURCE_CONSTRAINTS
 
 load_dotenv()
 
+# Largest window one catch-up pass fetches and aggregates
+CATCHUP_WINDOW_HOURS = int(os.getenv("WATCHDOG_CATCHUP_WINDOW_HOURS", 168))
+# Fetched pages buffered between the fetch stages and the DB writer
+PIPELINE_QUEUE_PAGES = int(os.getenv("WATCHDOG_QUEUE_PAGES", 8))
+
 def get_last_processed_hour():
-    conn = pymysql.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT MAX(datetime_beginning_ept) FROM pjm_rt_hrl_lmps")
-        result = cursor.fetchone()
-        last_time = result[0] if result else None
-        if not last_time:
-            return datetime.now() - timedelta(days=2)
-        return last_time
-    finally:
-        conn.close()
+    """Resume point: the last hour aggregated (re-done, since it may have been partial)."""
+    last_time = get_watermark(SOURCE_RT_HOURLY)
+    if not last_time:
+        return datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=2)
+    return last_time
 
-def calculate_and_save_hourly(target_hour_start):
-    conn = pymysql.connect(**DB_CONFIG)
+def aggregate_hours(start_hour, end_hour, advance=True):
+    """
+    Averages the 5-minute LMPs of every hour in [start_hour, end_hour) into
+    pjm_rt_hrl_lmps with one grouped statement, refreshes the zone-hour table over
+    the same range, and marks every aggregated hour 'u' in one set-based write.
+    advance=False leaves the rt_hrl_lmps watermark alone (the window's fetch was
+    incomplete, so the next cycle must start there again).
+    """
+    conn = connect()
     cursor = conn.cursor()
-    target_hour_end = target_hour_start + timedelta(minutes=59, seconds=59)
-    print(f"   🧮 Aggregating Hour: {target_hour_start}")
+    if end_hour - start_hour > timedelta(hours=1):
+        print(f"   🧮 Aggregating Hours: {start_hour} to {end_hour}")
+    else:
+        print(f"   🧮 Aggregating Hour: {start_hour}")
 
     try:
         sql_price = """
@@ -45,62 +55,179 @@ def calculate_and_save_hourly(target_hour_start):
             pnode_id,
             AVG(total_lmp_rt), AVG(congestion_price_rt), AVG(marginal_loss_price_rt)
         FROM pjm_rt_unverified_fivemin_lmps
-        WHERE datetime_beginning_ept BETWEEN %s AND %s
+        WHERE datetime_beginning_ept >= %s AND datetime_beginning_ept < %s
         GROUP BY pnode_id, hr_start
         ON DUPLICATE KEY UPDATE
             total_lmp_rt = VALUES(total_lmp_rt),
             congestion_price_rt = VALUES(congestion_price_rt),
             marginal_loss_price_rt = VALUES(marginal_loss_price_rt);
         """
-        cursor.execute(sql_price, (target_hour_start, target_hour_end))
+        cursor.execute(sql_price, (start_hour, end_hour))
+        refresh_zone_hours(cursor, start_hour, end_hour)
         
+        # Every hour that has 5-minute data, in one statement
         sql_status = """
         INSERT INTO pjm_hourly_status (datetime_beginning_ept, status)
-        VALUES (%s, 'u') ON DUPLICATE KEY UPDATE status = 'u';
+        SELECT DISTINCT DATE_FORMAT(datetime_beginning_ept, '%%Y-%%m-%%d %%H:00:00'), 'u'
+        FROM pjm_rt_unverified_fivemin_lmps
+        WHERE datetime_beginning_ept >= %s AND datetime_beginning_ept < %s
+        ON DUPLICATE KEY UPDATE status = 'u';
         """
-        cursor.execute(sql_status, (target_hour_start,))
+        cursor.execute(sql_status, (start_hour, end_hour))
+
+        # Latest hour that actually had 5-minute data, committed with its aggregate
+        sql_watermark = f"""
+        INSERT INTO {INGESTION_STATE_TABLE} (source, watermark)
+        SELECT %s, MAX(DATE_FORMAT(datetime_beginning_ept, '%%Y-%%m-%%d %%H:00:00'))
+        FROM pjm_rt_unverified_fivemin_lmps
+        WHERE datetime_beginning_ept >= %s AND datetime_beginning_ept < %s
+        HAVING MAX(datetime_beginning_ept) IS NOT NULL
+        ON DUPLICATE KEY UPDATE watermark = GREATEST(watermark, VALUES(watermark));
+        """
+        if advance:
+            cursor.execute(sql_watermark, (SOURCE_RT_HOURLY, start_hour, end_hour))
         conn.commit()
+        notify_backend_cache()
     except Exception as e:
         print(f"      ❌ Aggregation Error: {e}")
     finally:
         conn.close()
 
-def run_smart_cycle():
+def cycle_windows(start_hour, current_hour_floor):
+    """
+    (start, end, bulk) windows for one cycle: the complete hours missed while we were
+    down in chunks of up to CATCHUP_WINDOW_HOURS (bulk-loaded), then the live partial
+    hour. Catch-up comes first so get_last_processed_hour never skips a gap.
+    """
+    windows = []
+    window_start = start_hour
+    while window_start < current_hour_floor:
+        window_end = min(window_start + timedelta(hours=CATCHUP_WINDOW_HOURS), current_hour_floor)
+        windows.append((window_start, window_end, True))
+        window_start = window_end
+    windows.append((current_hour_floor, current_hour_floor + timedelta(hours=1), False))
+    return windows
+
+def _put_pages(loop, queue, kind, pages, bulk):
+    # Runs in a worker thread: blocking page iteration, back-pressured by the bounded queue
+    for page in pages:
+        asyncio.run_coroutine_threadsafe(queue.put((kind, page, bulk)), loop).result()
+
+async def fetch_lmps(queue, windows):
+    """
+    Fetch stage for 5-minute LMPs; queues each window's pages, then its aggregation.
+    Once a window's fetch fails (including single pnodes in a per-node pull), that
+    and every later window is aggregated without moving the watermark, so the next
+    cycle refetches from the failed window instead of skipping past it.
+    """
+    loop = asyncio.get_running_loop()
+    complete = True
+    for start, end, bulk in windows:
+        try:
+            await asyncio.to_thread(_put_pages, loop, queue, "lmps", iter_fivemin_pages(start, end - timedelta(seconds=1)), bulk)
+        except Exception as e:
+            complete = False
+            print(f"      ❌ LMP Fetch Error ({start}): {e}; watermark held at {start}")
+        await queue.put(("aggregate", (start, end, complete), bulk))
+
+async def fetch_constraints(queue, windows):
+    """
+    Fetch stage for binding constraints; runs independently of the LMP stage. Each
+    complete window is followed by a marker that lets the writer move the watermark;
+    after a failed window no more markers are sent, so the next sync resumes there.
+    """
+    loop = asyncio.get_running_loop()
+    complete = True
+    for start, end, bulk in windows:
+        try:
+            await asyncio.to_thread(_put_pages, loop, queue, "constraints", iter_constraint_pages(start, end - timedelta(seconds=1)), bulk)
+        except Exception as e:
+            complete = False
+            print(f"      ⚠️ Constraint Fetch Failed (Skipping): {e}")
+        if complete:
+            await queue.put(("constraints_done", (start, end), bulk))
+
+def _write(conn, kind, payload, bulk):
+    if kind == "lmps":
+        save_to_db(payload, conn, bulk)
+    elif kind == "constraints":
+        save_data_to_mysql(conn, payload, bulk)
+    else:
+        aggregate_hours(*payload)
+
+def _advance_constraints(conn, latest):
+    with conn.cursor() as cursor:
+        advance_watermark(cursor, SOURCE_CONSTRAINTS, latest)
+    conn.commit()
+
+async def db_writer(queue, conn):
+    """
+    DB-write stage: the single consumer, so an hour's pages land before its aggregation.
+    The constraints watermark moves at each window marker, up to the newest interval
+    written, and stops for the rest of the cycle once a constraint page fails to save;
+    likewise aggregations stop moving the RT watermark once an LMP page fails to save.
+    """
+    constraints_latest = None
+    constraints_failed = False
+    lmps_failed = False
+    while True:
+        job = await queue.get()
+        if job is None:
+            return
+        kind, payload, bulk = job
+        if kind == "constraints_done":
+            if not constraints_failed and constraints_latest:
+                await asyncio.to_thread(_advance_constraints, conn, constraints_latest)
+            continue
+        if kind == "aggregate":
+            start, end, complete = payload
+            payload = (start, end, complete and not lmps_failed)
+        try:
+            await asyncio.to_thread(_write, conn, kind, payload, bulk)
+            if kind == "constraints" and payload:
+                constraints_latest = max(constraints_latest or "", max(item['datetime_beginning_ept'] for item in payload))
+        except Exception as e:
+            constraints_failed |= kind == "constraints"
+            lmps_failed |= kind == "lmps"
+            print(f"      ❌ DB Write Error ({kind}): {e}")
+
+async def run_smart_cycle():
+    """
+    One watchdog cycle as a pipeline: the LMP and constraint fetch stages run
+    concurrently (sharing the PJM client's global rate limiter) and feed a bounded
+    queue drained by one DB writer, so a slow endpoint never holds up the other
+    feed and the live hour is written as soon as its pages arrive.
+    """
     print("\n🔎 Checking Database Status...")
-    last_processed = get_last_processed_hour()
-    next_target = last_processed
+    last_processed = await asyncio.to_thread(get_last_processed_hour)
     
     now = datetime.now()
     current_hour_floor = datetime(now.year, now.month, now.day, now.hour)
 
-    print(f"📉 Processing from {next_target} up to Current Hour ({current_hour_floor})...")
+    if last_processed > current_hour_floor:
+        return False
 
-    while next_target <= current_hour_floor:
-        loop_start_time = time.time()
-        window_end = next_target + timedelta(minutes=59, seconds=59)
-        
-        fetch_and_upsert_batch(next_target, window_end)
-        try:
-            fetch_constraints_batch(next_target, window_end)
-        except Exception as e:
-            print(f"      ⚠️ Constraint Fetch Failed (Skipping): {e}")
+    print(f"📉 Processing from {last_processed} up to Current Hour ({current_hour_floor})...")
+    windows = cycle_windows(last_processed, current_hour_floor)
+    if len(windows) > 1:
+        print(f"   ⏩ Catching up {last_processed} to {current_hour_floor} in {len(windows) - 1} window(s)...")
 
-        # 3. Update Average & Set Status 'u' Unverified
-        calculate_and_save_hourly(next_target)
-        
-        if next_target == current_hour_floor:
-            print(f"      ⚡ Updated LIVE Partial Average for {next_target}")
-            return False
-        
-        next_target += timedelta(hours=1)
-        
-        elapsed = time.time() - loop_start_time
-        if (12 - elapsed) > 0:
-            time.sleep(12 - elapsed)
-            
-    return True
+    # Connect before any fetch starts, so producers never block on a writer that failed to open
+    conn = await asyncio.to_thread(connect)
+    queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_PAGES)
+    writer = asyncio.create_task(db_writer(queue, conn))
+    try:
+        await asyncio.gather(fetch_lmps(queue, windows), fetch_constraints(queue, windows))
+        await queue.put(None)
+        await writer
+    finally:
+        writer.cancel()
+        conn.close()
 
-if __name__ == "__main__":
+    print(f"      ⚡ Updated LIVE Partial Average for {current_hour_floor}")
+    return False
+
+async def main():
     print("🚀 Starting Integrated Watchdog...")
     last_sweep = datetime.min 
     
@@ -108,21 +235,24 @@ if __name__ == "__main__":
         try:
             # Runs Every 6 Hours
             if datetime.now() - last_sweep > timedelta(hours=6):
-                run_all_syncs()
+                await asyncio.to_thread(run_all_syncs)
                 last_sweep = datetime.now()
                 print("      ⏳ Pausing 10s after Sync...")
-                time.sleep(10)
+                await asyncio.sleep(10)
 
             # Runs Every 5 Min
-            did_work = run_smart_cycle()
+            did_work = await run_smart_cycle()
             
             if not did_work:
                 print("💤 Up to date. Waiting 5 minutes...")
-                time.sleep(300)
+                await asyncio.sleep(300)
 
-        except KeyboardInterrupt:
-            print("\n🛑 Stopping...")
-            break
         except Exception as e:
             print(f"CRITICAL ERROR: {e}")
-            time.sleep(60)
+            await asyncio.sleep(60)
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping...")
@@ -0,0 +1,254 @@
+# src/hydrate/pjm_api.py
+#
+# Shared client for PJM Data Miner 2. Every request goes through one token bucket
+# sized to the account's quota, so concurrent fetches never exceed it, and 429/5xx
+# responses are retried with backoff (honouring Retry-After).
+#
+# Point PJM_API_BASE_URL at src/bench/pjm_stub_server.py to exercise it locally.
+
+import os
+import math
+import time
+import random
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PJM_API_KEY = os.getenv("PJM_API_KEY")
+PJM_API_BASE_URL = os.getenv("PJM_API_BASE_URL", "https://api.pjm.com/api/v1").rstrip("/")
+PJM_RATE_PER_MIN = float(os.getenv("PJM_RATE_PER_MIN", 6))  # Data Miner 2 non-member quota
+PJM_RATE_BURST = int(os.getenv("PJM_RATE_BURST", 1))
+PJM_MAX_IN_FLIGHT = int(os.getenv("PJM_MAX_IN_FLIGHT", 4))
+PJM_MAX_RETRIES = int(os.getenv("PJM_MAX_RETRIES", 5))
+
+PJM_MAX_ROW_COUNT = 50000  # largest page Data Miner 2 will serve
+
+# Cost model for choosing between one all-pnode query and per-pnode queries
+PJM_TOTAL_PNODES = int(os.getenv("PJM_TOTAL_PNODES", 12000))  # approx. pnodes in an unfiltered feed
+PJM_ROWS_PER_SECOND = float(os.getenv("PJM_ROWS_PER_SECOND", 25000))  # download + JSON decode throughput
+
+# The pnodes this app tracks
+PNODE_IDS = [
+    51217, 51288, 4669664, 5413134, 31252687, 33092311, 33092313,
+    33092315, 34497125, 34497127, 34497151, 35010337, 40523629,
+    56958967, 81436855, 116013751, 116472927, 116472931, 116472933,
+    116472935, 116472937, 116472939, 116472941, 116472943,
+    116472945, 116472947, 116472949, 116472951, 116472953,
+    116472955, 116472957, 116472959, 126769999, 1069452904,
+    1124361945, 1127872598, 1258625176, 1269364670, 1269364671,
+    1269364672, 1269364674, 1288248099, 1304468347, 1441662202,
+    1709726615, 2156111904
+]
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 120
+
+class TokenBucket:
+    """Thread-safe token bucket: rate_per_min requests a minute, bursts of at most `capacity`."""
+    def __init__(self, rate_per_min, capacity=1):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stops every caller for `seconds`, e.g. after the server answers 429."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+class PJMIncompleteFetchError(RuntimeError):
+    """A paged query stopped returning rows before reaching the totalRows it reported."""
+
+class PJMPartialFetchError(RuntimeError):
+    """
+    Raised by iter_pnode_pages after it has yielded every pnode that succeeded;
+    `failed` maps each failed pnode_id to its error so the caller can retry them.
+    """
+    def __init__(self, feed, failed):
+        self.failed = failed
+        super().__init__(f"{feed}: {len(failed)} pnode(s) failed: {', '.join(str(p) for p in sorted(failed))}")
+
+def retry_delay(response, attempt):
+    """Retry-After when the server sends one, else exponential backoff with jitter."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+    return min(2 ** attempt + random.uniform(0, 1), MAX_BACKOFF_SECONDS)
+
+class PJMClient:
+    """
+    Rate-limited, retrying GETs against Data Miner 2 feeds (e.g. 'da_hrl_lmps').
+    One client should be shared by every thread of a run so they share the quota.
+    """
+    def __init__(self, api_key=None, base_url=None, rate_per_min=None, burst=None,
+                 max_in_flight=None, max_retries=None, timeout=60):
+        self.api_key = api_key or PJM_API_KEY
+        self.base_url = (base_url or PJM_API_BASE_URL).rstrip("/")
+        self.bucket = TokenBucket(rate_per_min or PJM_RATE_PER_MIN, burst or PJM_RATE_BURST)
+        self.max_in_flight = max_in_flight or PJM_MAX_IN_FLIGHT
+        self.max_retries = PJM_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout
+        self._local = threading.local()
+        self.requests_made = 0
+        self.bytes_downloaded = 0
+        self._stats_lock = threading.Lock()
+
+    def _session(self):
+        # requests.Session is not thread-safe; keep one per worker thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+            self._local.session.headers["Ocp-Apim-Subscription-Key"] = self.api_key or ""
+        return self._local.session
+
+    def get(self, feed, params):
+        """Returns the decoded JSON body, raising requests.HTTPError once retries are exhausted."""
+        url = f"{self.base_url}/{feed}"
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = None
+            try:
+                response = self._session().get(url, params=params, timeout=self.timeout)
+                with self._stats_lock:
+                    self.requests_made += 1
+                    self.bytes_downloaded += len(response.content)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+
+            delay = retry_delay(response, attempt)
+            if response is not None and response.status_code == 429:
+                self.bucket.pause(delay)
+            print(f"      🔁 {feed}: retry {attempt + 1}/{self.max_retries} in {delay:.1f}s "
+                  f"({response.status_code if response is not None else 'connection error'})")
+            time.sleep(delay)
+
+    def iter_pages(self, feed, params, page_size=PJM_MAX_ROW_COUNT):
+        """
+        Yields each page of items for a query, advancing startRow until totalRows says
+        the result set is exhausted; a short page only ends it when totalRows is
+        missing. A short page mid-stream is followed by a request for the rest, and
+        PJMIncompleteFetchError is raised if rows stop coming before totalRows.
+        startRow/rowCount in params are overridden, so callers can ask for any window
+        and write each page as it lands.
+        """
+        start_row = 1
+        while True:
+            body = self.get(feed, dict(params, startRow=start_row, rowCount=page_size))
+            items = body.get("items", [])
+            if items:
+                yield items
+            start_row += len(items)
+            total_rows = body.get("totalRows")
+            if total_rows is None:
+                if len(items) < page_size:
+                    return
+            elif start_row > total_rows:
+                return
+            elif not items:
+                raise PJMIncompleteFetchError(f"{feed}: got {start_row - 1} of {total_rows} rows")
+            elif len(items) < page_size:
+                print(f"      ⚠️ {feed}: short page ({len(items)} rows) at row {start_row - len(items)} of {total_rows}; continuing")
+
+    def fetch_items(self, feed, params):
+        """Every page of a query as one list."""
+        return [item for page in self.iter_pages(feed, params) for item in page]
+
+    def map_fetch(self, feed, param_sets):
+        """
+        Fetches every param set with up to max_in_flight requests outstanding and
+        yields (params, items, error) as each completes, so the caller can write to
+        the database while the remaining requests are still on the wire.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            futures = {pool.submit(self.fetch_items, feed, params): params for params in param_sets}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def plan_pnode_fetch(self, n_pnodes, n_hours, rows_per_hour):
+        """
+        Estimates seconds for both pnode strategies over a window and returns the cheaper
+        one with the estimates. Each request costs one token of the quota; each row costs
+        transfer and decode time, so unfiltered pulls win on small quotas and short
+        windows, per-pnode pulls once the quota is generous or the window is long.
+        """
+        seconds_per_request = 1.0 / self.bucket.rate
+        rows_per_node = max(1, math.ceil(n_hours * rows_per_hour))
+
+        all_rows = rows_per_node * PJM_TOTAL_PNODES
+        all_requests = math.ceil(all_rows / PJM_MAX_ROW_COUNT)
+        node_rows = rows_per_node * n_pnodes
+        node_requests = n_pnodes * math.ceil(rows_per_node / PJM_MAX_ROW_COUNT)
+
+        estimates = {
+            "all": all_requests * seconds_per_request + all_rows / PJM_ROWS_PER_SECOND,
+            "per_node": node_requests * seconds_per_request + node_rows / PJM_ROWS_PER_SECOND,
+        }
+        return min(estimates, key=estimates.get), estimates
+
+    def iter_pnode_pages(self, feed, params, pnode_ids, n_hours, rows_per_hour, strategy="auto"):
+        """
+        Yields pages holding only `pnode_ids`. "all" pages through the unfiltered feed
+        and drops other pnodes here; "per_node" sends one pnode_id-filtered query per
+        node through map_fetch, keeps going past failed nodes and raises
+        PJMPartialFetchError naming them once the others have all been yielded.
+        "auto" lets plan_pnode_fetch pick for the window.
+        """
+        if strategy == "auto":
+            strategy, _ = self.plan_pnode_fetch(len(pnode_ids), n_hours, rows_per_hour)
+
+        if strategy == "all":
+            targets = set(pnode_ids)
+            for page in self.iter_pages(feed, params):
+                kept = [item for item in page if item.get("pnode_id") in targets]
+                if kept:
+                    yield kept
+            return
+
+        failed = {}
+        for node_params, items, error in self.map_fetch(feed, [dict(params, pnode_id=pnode_id) for pnode_id in pnode_ids]):
+            if error:
+                failed[node_params["pnode_id"]] = error
+            elif items:
+                yield items
+        if failed:
+            raise PJMPartialFetchError(feed, failed)
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide client, so every fetcher in one run (e.g. the watchdog) shares a single quota."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = PJMClient()
+        return _default_client
@@ -1,76 +1,63 @@
-import os
 import sys
-import requests
-import pymysql
-from pymysql.cursors import DictCursor
 from dotenv import load_dotenv
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-sys.path.append(parent_dir)
-
-from update_pjm_db import PNODE_IDS 
+from pjm_api import get_client, PJM_API_KEY, PNODE_IDS
+from db_pool import connect, DB_CONFIG
+from db_bulk import bulk_upsert
 
 load_dotenv()
 
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME"),
-    "port": int(os.getenv("DB_PORT", 3306)),
-    "cursorclass": DictCursor
-}
-
-PJM_API_KEY = os.getenv("PJM_API_KEY")
-PJM_API_ENDPOINT = 'https://api.pjm.com/api/v1/rt_unverified_fivemin_lmps'
+FIVEMIN_FEED = 'rt_unverified_fivemin_lmps'
 DB_TABLE_NAME = 'pjm_rt_unverified_fivemin_lmps'
-TARGET_PNODES = set(PNODE_IDS)
-
-def fetch_and_upsert_batch(start_dt, end_dt):
-    """
-    Accepts datetime objects (e.g., 2023-10-27 08:00:00)
-    """
-    if not all([PJM_API_KEY, DB_CONFIG["host"]]):
-        print("Error: Missing environment variables.")
-        return
+FIVEMIN_COLUMNS = (
+    'datetime_beginning_ept', 'pnode_id', 'pnode_name',
+    'total_lmp_rt', 'congestion_price_rt', 'marginal_loss_price_rt'
+)
 
+def iter_fivemin_pages(start_dt, end_dt):
+    """Yields pages of 5-minute LMPs for the window; only our pnodes are requested or kept."""
     time_range_string = f"{start_dt.strftime('%Y-%m-%d %H:%M:%S')} to {end_dt.strftime('%Y-%m-%d %H:%M:%S')}"
     
     print(f"   ⬇️ Fetching Raw: {time_range_string}")
 
     params = {
-        'rowCount': 50000, 
         'order': 'Asc',
-        'startRow': 1,
         'datetime_beginning_ept': time_range_string,
         'fields': 'datetime_beginning_ept,pnode_id,pnode_name,total_lmp_rt,congestion_price_rt,marginal_loss_price_rt'
     }
-    
-    headers = {'Ocp-Apim-Subscription-Key': PJM_API_KEY}
+    n_hours = (end_dt - start_dt).total_seconds() / 3600
+    yield from get_client().iter_pnode_pages(FIVEMIN_FEED, params, PNODE_IDS, n_hours, rows_per_hour=12)
 
+def fetch_and_upsert_batch(start_dt, end_dt, bulk=False):
+    """
+    Accepts datetime objects (e.g., 2023-10-27 08:00:00). bulk=True stages each
+    page through db_bulk instead of executemany, for long backfills.
+    """
+    if not all([PJM_API_KEY, DB_CONFIG["host"]]):
+        print("Error: Missing environment variables.")
+        return
+
+    conn = None
     try:
-        response = requests.get(PJM_API_ENDPOINT, headers=headers, params=params, timeout=60)
-        response.raise_for_status()
-        
-        all_items = response.json().get('items', [])
-        filtered_items = [item for item in all_items if item.get('pnode_id') in TARGET_PNODES]
-        
-        if filtered_items:
-            save_to_db(filtered_items)
-            return len(filtered_items)
-        else:
+        # Each page is upserted as it lands
+        conn = connect()
+        saved = 0
+        for filtered_items in iter_fivemin_pages(start_dt, end_dt):
+            save_to_db(filtered_items, conn, bulk)
+            saved += len(filtered_items)
+
+        if not saved:
             print("      ⚠️ No data found for this window.")
-            return 0
+        return saved
 
     except Exception as e:
         print(f"      ❌ Error: {e}")
         return 0
+    finally:
+        if conn: conn.close()
 
-def save_to_db(items):
-    conn = pymysql.connect(**DB_CONFIG)
+def save_to_db(items, conn, bulk=False):
     cursor = conn.cursor()
     try:
         rows_to_upsert = [
@@ -90,18 +77,21 @@ def save_to_db(items):
                 congestion_price_rt = VALUES(congestion_price_rt),
                 marginal_loss_price_rt = VALUES(marginal_loss_price_rt)
         """
-        cursor.executemany(sql_upsert, rows_to_upsert)
+        if bulk:
+            bulk_upsert(conn, DB_TABLE_NAME, FIVEMIN_COLUMNS, rows_to_upsert, update_columns=FIVEMIN_COLUMNS[3:])
+        else:
+            cursor.executemany(sql_upsert, rows_to_upsert)
         conn.commit()
     finally:
         cursor.close()
-        conn.close()
 
 if __name__ == '__main__':
     end_d = datetime.now()
     start_d = datetime(end_d.year, end_d.month, end_d.day) 
     
-    if len(sys.argv) > 2:
-        start_d = datetime.fromisoformat(sys.argv[1])
-        end_d = datetime.fromisoformat(sys.argv[2])
+    args = [a for a in sys.argv[1:] if a != '--bulk']
+    if len(args) > 1:
+        start_d = datetime.fromisoformat(args[0])
+        end_d = datetime.fromisoformat(args[1])
 
-    fetch_and_upsert_batch(start_d, end_d)
+    fetch_and_upsert_batch(start_d, end_d, bulk='--bulk' in sys.argv)
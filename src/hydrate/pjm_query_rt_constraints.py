@@ -1,38 +1,37 @@
 import os
 import sys
-import time
-import requests
 import pymysql
-from pymysql.cursors import DictCursor
 from dotenv import load_dotenv
 from datetime import date, datetime, timedelta
 
+from pjm_api import get_client, PJM_API_KEY
+from db_pool import connect, DB_CONFIG
+from db_bulk import bulk_upsert
+from db_state import advance_watermark, SOURCE_CONSTRAINTS
+from db_aggregates import notify_backend_cache
+
 load_dotenv()
 
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME"),
-    "port": int(os.getenv("DB_PORT", 3306)),
-    "cursorclass": DictCursor
-}
-
-PJM_API_KEY = os.getenv("PJM_API_KEY")
-API_URL = "https://api.pjm.com/api/v1/rt_marginal_value" 
+CONSTRAINTS_FEED = "rt_marginal_value"
+# Days per backfill request; paging takes care of the row count
+BACKFILL_WINDOW_DAYS = int(os.getenv("CONSTRAINTS_BACKFILL_WINDOW_DAYS", 31))
 TABLE_NAME = "pjm_binding_constraints"
+HOURS_TABLE_NAME = "pjm_constraint_hours"
+FACILITIES_TABLE_NAME = "pjm_constraint_facilities"
+CONSTRAINT_COLUMNS = (
+    "datetime_beginning_ept", "monitored_facility", "contingency_facility",
+    "transmission_constraint_penalty_factor", "limit_control_percentage", "shadow_price"
+)
 
-def fetch_pjm_data(start_dt: datetime, end_dt: datetime, api_key: str) -> list:
+def iter_constraint_pages(start_dt: datetime, end_dt: datetime):
     """
-    Fetches records for a specific DATETIME range.
+    Yields pages of constraint records for a DATETIME range, following PJM's
+    paging so windows of any size come back complete.
     """
-    headers = {'Ocp-Apim-Subscription-Key': api_key}
     start_str = start_dt.strftime("%Y-%m-%dT%H:%M:%S")
     end_str = end_dt.strftime("%Y-%m-%dT%H:%M:%S")
     
     params = {
-        'startRow': 1,
-        'rowCount': 50000, 
         'datetime_beginning_ept': start_str,
         'datetime_ending_ept': end_str,
         'format': 'json'
@@ -41,17 +40,29 @@ def fetch_pjm_data(start_dt: datetime, end_dt: datetime, api_key: str) -> list:
     if (end_dt - start_dt) > timedelta(hours=1):
         print(f"      ⛓️  Fetching PJM Constraints: {start_str} to {end_str}...")
 
-    try:
-        response = requests.get(API_URL, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
-        items = response.json().get('items', [])
-        return items
-    except requests.exceptions.RequestException as e:
-        print(f"      ⚠️ API Error ({start_str}): {e}")
-        return []
-
-def save_data_to_mysql(conn, items: list) -> int:
-    """Saves a list of PJM constraint items to the MySQL database."""
+    yield from get_client().iter_pages(CONSTRAINTS_FEED, params)
+
+def fetch_and_save_constraints(conn, start_dt: datetime, end_dt: datetime, bulk: bool = False):
+    """
+    Streams each page into save_data_to_mysql. Returns (fetched, inserted, latest), latest
+    being the newest interval saved (None if there were no records). Raises on the first
+    failed page, so callers only move the watermark after a window completes.
+    """
+    fetched = inserted = 0
+    latest = None
+    for items in iter_constraint_pages(start_dt, end_dt):
+        fetched += len(items)
+        inserted += save_data_to_mysql(conn, items, bulk)
+        if items:
+            latest = max(latest or "", max(item['datetime_beginning_ept'] for item in items))
+    return fetched, inserted, latest
+
+def save_data_to_mysql(conn, items: list, bulk: bool = False) -> int:
+    """
+    Saves a list of PJM constraint items to the MySQL database. bulk=True stages the
+    rows through db_bulk (same INSERT IGNORE semantics) instead of executemany. Rolls
+    back and re-raises on a DB error. Leaves the binding_constraints watermark to the caller.
+    """
     if not items:
         return 0
         
@@ -71,15 +82,43 @@ def save_data_to_mysql(conn, items: list) -> int:
             item.get('limit_control_percentage'), item.get('shadow_price')
         ) for item in items
     ]
+
+    # One row per (facility, hour) the constraint was binding
+    constraint_hours = {
+        (item.get('monitored_facility'), datetime.fromisoformat(item.get('datetime_beginning_ept')).replace(minute=0, second=0))
+        for item in items if item.get('monitored_facility')
+    }
+    sql_hours = f"INSERT IGNORE INTO {HOURS_TABLE_NAME} (monitored_facility, hour_beginning) VALUES (%s, %s)"
+
+    # Refresh first/last seen and binding-hour counts for the facilities in this batch
+    sql_facilities = f"""
+        INSERT INTO {FACILITIES_TABLE_NAME} (monitored_facility, first_seen, last_seen, binding_hours)
+        SELECT monitored_facility, MIN(hour_beginning), MAX(hour_beginning), COUNT(*)
+        FROM {HOURS_TABLE_NAME}
+        WHERE monitored_facility IN %s
+        GROUP BY monitored_facility
+        ON DUPLICATE KEY UPDATE
+            first_seen = VALUES(first_seen),
+            last_seen = VALUES(last_seen),
+            binding_hours = VALUES(binding_hours)
+    """
         
     try:
-        cursor.executemany(sql, rows_to_insert)
+        if bulk:
+            inserted = bulk_upsert(conn, TABLE_NAME, CONSTRAINT_COLUMNS, rows_to_insert, ignore=True)
+            bulk_upsert(conn, HOURS_TABLE_NAME, ("monitored_facility", "hour_beginning"), list(constraint_hours), ignore=True)
+        else:
+            cursor.executemany(sql, rows_to_insert)
+            inserted = cursor.rowcount
+            cursor.executemany(sql_hours, list(constraint_hours))
+        if constraint_hours:
+            cursor.execute(sql_facilities, (tuple({facility for facility, _ in constraint_hours}),))
         conn.commit()
-        return cursor.rowcount
+        return inserted
     except pymysql.Error as e:
         print(f"      ❌ DB Insert Error: {e}")
         conn.rollback()
-        return 0
+        raise
 
 # --- Watchdog Entry---
 
@@ -89,13 +128,10 @@ def fetch_constraints_batch(start_dt: datetime, end_dt: datetime):
     """
     conn = None
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        items = fetch_pjm_data(start_dt, end_dt, PJM_API_KEY)
-        if items:
-            count = save_data_to_mysql(conn, items)
-            print(f"      ⛓️  Constraints: {len(items)} fetched, {count} inserted.")
-        else:
-            pass
+        conn = connect()
+        fetched, count, _ = fetch_and_save_constraints(conn, start_dt, end_dt)
+        if fetched:
+            print(f"      ⛓️  Constraints: {fetched} fetched, {count} inserted.")
     except Exception as e:
         print(f"      ⚠️ Constraint Batch Failed: {e}")
         raise e
@@ -104,47 +140,68 @@ def fetch_constraints_batch(start_dt: datetime, end_dt: datetime):
 
 # --- Backfill Entry ---
 
-if __name__ == "__main__":
-    
-    if not all([PJM_API_KEY, DB_CONFIG["host"]]):
-        print("--- CONFIGURATION ERROR: Check .env file ---")
-        sys.exit(1)
-
-    if len(sys.argv) > 2:
-        START_DATE_STR = sys.argv[1]
-        END_DATE_STR = sys.argv[2]
-        print(f"--- Dynamic Mode: Processing {START_DATE_STR} to {END_DATE_STR} ---")
-    else:
-        START_DATE_STR = "2025-11-21"
-        END_DATE_STR = "2025-11-21"
-        print(f"--- Manual Mode: Processing {START_DATE_STR} to {END_DATE_STR} ---")
-
-    # Convert strings
-    start_date = date.fromisoformat(START_DATE_STR)
-    end_date = date.fromisoformat(END_DATE_STR)
-    
+def backfill_constraints(start_date: date, end_date: date, bulk: bool = False):
+    """
+    Fetches and saves constraints for [start_date, end_date] in BACKFILL_WINDOW_DAYS
+    windows (rate limiting is handled by the shared PJM client). start_date may be a
+    datetime (e.g. an ingestion_state watermark) to resume mid-day. The watermark moves
+    after each complete window and stops at the first failed one, so the next run
+    resumes there. Importable, so db_dailysync runs it in-process.
+    """
+    resume_from = start_date if isinstance(start_date, datetime) else None
+    advancing = True
     conn = None
     try:
-        conn = pymysql.connect(**DB_CONFIG)
+        conn = connect()
         
-        # Loop by Day
-        current_date = start_date
+        current_date = resume_from.date() if resume_from else start_date
         while current_date <= end_date:
+            window_end = min(current_date + timedelta(days=BACKFILL_WINDOW_DAYS - 1), end_date)
             dt_start = datetime.combine(current_date, datetime.min.time())
-            dt_end = datetime.combine(current_date, datetime.max.time())
+            if resume_from and resume_from > dt_start:
+                dt_start = resume_from
+            dt_end = datetime.combine(window_end, datetime.max.time())
             
-            items = fetch_pjm_data(dt_start, dt_end, PJM_API_KEY)
+            try:
+                fetched, rows, latest = fetch_and_save_constraints(conn, dt_start, dt_end, bulk)
+                if fetched:
+                    print(f"   -> {current_date} to {window_end}: {fetched} items, {rows} new.")
+                else:
+                    print(f"   -> {current_date} to {window_end}: No constraints found.")
+                if advancing and latest:
+                    with conn.cursor() as cursor:
+                        advance_watermark(cursor, SOURCE_CONSTRAINTS, latest)
+                    conn.commit()
+            except Exception as e:
+                if advancing:
+                    print(f"      ⏸️  Constraints watermark held before {current_date}.")
+                advancing = False
+                print(f"      ⚠️ API Error ({current_date} to {window_end}): {e}")
             
-            if items:
-                rows = save_data_to_mysql(conn, items)
-                print(f"   -> {current_date}: {len(items)} items, {rows} new.")
-            else:
-                print(f"   -> {current_date}: No constraints found.")
-            
-            current_date += timedelta(days=1)
-            time.sleep(2) # Rate limit safety
+            current_date = window_end + timedelta(days=1)
             
     except Exception as e:
         print(f"CRITICAL ERROR: {e}")
     finally:
         if conn: conn.close()
+    notify_backend_cache(resume_from.date() if resume_from else start_date, end_date)
+
+if __name__ == "__main__":
+    
+    if not all([PJM_API_KEY, DB_CONFIG["host"]]):
+        print("--- CONFIGURATION ERROR: Check .env file ---")
+        sys.exit(1)
+
+    # --bulk anywhere switches to the bulk-load path
+    bulk = "--bulk" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--bulk"]
+    if len(args) > 1:
+        START_DATE_STR = args[0]
+        END_DATE_STR = args[1]
+        print(f"--- Dynamic Mode: Processing {START_DATE_STR} to {END_DATE_STR} ---")
+    else:
+        START_DATE_STR = "2025-11-21"
+        END_DATE_STR = "2025-11-21"
+        print(f"--- Manual Mode: Processing {START_DATE_STR} to {END_DATE_STR} ---")
+
+    backfill_constraints(date.fromisoformat(START_DATE_STR), date.fromisoformat(END_DATE_STR), bulk)
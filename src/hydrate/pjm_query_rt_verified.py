@@ -0,0 +1,30 @@
+# src/hydrate/pjm_query_rt_verified.py
+#
+# Verified (settled) Real-Time hourly LMPs. They overwrite the watchdog's hourly
+# averages of unverified 5-minute prices and mark those hours 'v'. Used by
+# db_dailysync's rolling re-check and by db_gaps to fill missing hours.
+
+VERIFIED_FEED = 'rt_hrl_lmps'
+VERIFIED_FIELDS = 'datetime_beginning_ept,pnode_id,total_lmp_rt,congestion_price_rt,marginal_loss_price_rt'
+DB_TABLE_NAME = 'pjm_rt_hrl_lmps'
+
+def upsert_verified_rt_items(cursor, items):
+    """Upserts verified items and marks their hours 'v'. Does not commit. Returns the hours touched."""
+    sql_price = f"""
+    INSERT INTO {DB_TABLE_NAME}
+    (datetime_beginning_ept, pnode_id, total_lmp_rt, congestion_price_rt, marginal_loss_price_rt)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_lmp_rt = VALUES(total_lmp_rt),
+        congestion_price_rt = VALUES(congestion_price_rt),
+        marginal_loss_price_rt = VALUES(marginal_loss_price_rt)
+    """
+    rows = [(i['datetime_beginning_ept'], i['pnode_id'], i['total_lmp_rt'], i['congestion_price_rt'], i['marginal_loss_price_rt']) for i in items]
+    if not rows:
+        return set()
+    cursor.executemany(sql_price, rows)
+
+    hours = {i['datetime_beginning_ept'] for i in items}
+    sql_status = "INSERT INTO pjm_hourly_status (datetime_beginning_ept, status) VALUES (%s, 'v') ON DUPLICATE KEY UPDATE status = 'v';"
+    cursor.executemany(sql_status, [(t,) for t in hours])
+    return hours